@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# optionz/benchmarks/bench_optionz.py
+
+"""
+Time optionz against argparse on equivalent specifications: building
+specs of 10, 1000 and 10000 options, fresh or from the on-disk cache,
+parsing, choosing among large sets of choices, and dumping wide and
+list-heavy Namespaces.
+
+Results are written as JSON, one entry per case giving the best time
+per call for each implementation and their ratio, so that runs from
+different releases can be compared.  argparse has no formatter to
+match dump_options(), so its time and the ratio of the dump cases are
+null:
+
+    benchmarks/bench_optionz.py -o new.json --compare old.json
+
+The checkout's src/ directory is searched before any installed optionz.
+"""
+
+import argparse
+import atexit
+import functools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# pylint: disable=wrong-import-position
+import optionz  # noqa: E402
+from optionz import CompiledOptionz, Optionz, ValType, dump_options  # noqa
+
+SIZES = (10, 1000, 10000)
+QUICK_SIZES = (10, 100)
+
+# in the order they are run
+CASES = ('construct', 'cached', 'parse', 'choices', 'dump_wide', 'dump_lists')
+
+
+# building equivalent specifications -----------------------------
+
+def build_optionz(size):
+    """ Build an Optionz spec of size int, str and bool options. """
+    spec = Optionz('bench')
+    for ndx in range(size):
+        kind = ndx % 3
+        if kind == 0:
+            spec.add_option('opt%d' % ndx, ValType.INT, ndx)
+        elif kind == 1:
+            spec.add_option('opt%d' % ndx, ValType.STR, 'x')
+        else:
+            spec.add_option('opt%d' % ndx, ValType.BOOL)
+    return spec
+
+
+def build_argparse(size):
+    """ Build the ArgumentParser equivalent to build_optionz(size). """
+    parser = argparse.ArgumentParser('bench', add_help=False)
+    for ndx in range(size):
+        kind = ndx % 3
+        tag = '--opt%d' % ndx
+        if kind == 0:
+            parser.add_argument(tag, type=int, default=ndx)
+        elif kind == 1:
+            parser.add_argument(tag, default='x')
+        else:
+            parser.add_argument(tag, action='store_true')
+    return parser
+
+
+def sample_args(size, count=30):
+    """ Return arguments setting up to count options of either spec. """
+    args = []
+    for ndx in range(0, size, max(1, size // count)):
+        kind = ndx % 3
+        args.append('--opt%d' % ndx)
+        if kind == 0:
+            args.append(str(ndx * 7))
+        elif kind == 1:
+            args.append('value%d' % ndx)
+    return args
+
+
+# the cases ------------------------------------------------------
+
+def case_construct(size):
+    """ Build a spec of size options, ready to parse. """
+    return (lambda: build_optionz(size).compile(),
+            lambda: build_argparse(size))
+
+
+def case_cached(size):
+    """ Load a compiled spec of size options from the on-disk cache. """
+    cache_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, cache_dir, True)
+    key = 'bench %d' % size
+    build = functools.partial(build_optionz, size)
+    CompiledOptionz.cached(cache_dir, key, build)      # fill the cache
+    return (lambda: CompiledOptionz.cached(cache_dir, key, build),
+            lambda: build_argparse(size))
+
+
+def case_parse(size):
+    """ Parse about thirty options with a spec of size options. """
+    compiled = build_optionz(size).compile()
+    parser = build_argparse(size)
+    args = sample_args(size)
+    return (lambda: compiled.parse(args),
+            lambda: parser.parse_args(args))
+
+
+def case_choices(size):
+    """ Parse the last of size choices. """
+    choices = ['choice%d' % ndx for ndx in range(size)]
+    spec = Optionz('bench')
+    spec.add_choice_option('pick', choices, choices[0])
+    compiled = spec.compile()
+    parser = argparse.ArgumentParser('bench', add_help=False)
+    parser.add_argument('--pick', choices=choices, default=choices[0])
+    args = ['--pick', choices[-1]]
+    return (lambda: compiled.parse(args),
+            lambda: parser.parse_args(args))
+
+
+def case_dump_wide(size):
+    """ Dump a Namespace of size scalar values. """
+    ns_ = argparse.Namespace(**{'opt%d' % ndx: ndx for ndx in range(size)})
+    # argparse has nothing equivalent: repr() is no formatted table
+    return (lambda: dump_options(ns_), None)
+
+
+def case_dump_lists(size):
+    """ Dump a Namespace of ten lists of size values each. """
+    ns_ = argparse.Namespace(**{'list%d' % ndx: list(range(size))
+                                for ndx in range(10)})
+    return (lambda: dump_options(ns_), None)
+
+
+# running and reporting -------------------------------------------
+
+def best_time(func, repeat, min_time):
+    """
+    Return the best seconds per call of func over repeat runs, each of
+    enough calls to take at least min_time seconds.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, timer.timeit(number))
+    return best / number
+
+
+def run(cases, sizes, repeat, min_time):
+    """
+    Time each case at each size, returning a list of result dicts.  A
+    case without an argparse equivalent gets None for its argparse time
+    and ratio.
+    """
+    results = []
+    for case in cases:
+        make = globals()['case_' + case]
+        for size in sizes:
+            ours, theirs = make(size)
+            ours_time = best_time(ours, repeat, min_time)
+            entry = {'case': case, 'size': size, 'optionz': ours_time,
+                     'argparse': None, 'ratio': None}
+            line = '%-10s %6d  optionz %10.3e s' % (case, size, ours_time)
+            if theirs is not None:
+                theirs_time = best_time(theirs, repeat, min_time)
+                entry['argparse'] = theirs_time
+                entry['ratio'] = ours_time / theirs_time
+                line += '  argparse %10.3e s  ratio %6.3f' % (
+                    theirs_time, ours_time / theirs_time)
+            results.append(entry)
+            print(line, file=sys.stderr)
+    return results
+
+
+def compare(results, old_path):
+    """
+    Report, on stderr, how each case's optionz time changed from the
+    same case in an earlier report.
+    """
+    with open(old_path, 'r') as file:
+        old = {(entry['case'], entry['size']): entry
+               for entry in json.load(file)['results']}
+    for entry in results:
+        before = old.get((entry['case'], entry['size']))
+        if before is not None:
+            print('%-10s %6d  optionz %+7.1f%%' % (
+                entry['case'], entry['size'],
+                100.0 * (entry['optionz'] / before['optionz'] - 1.0)),
+                file=sys.stderr)
+
+
+def main(argv=None):
+    """ Run the benchmarks and write the JSON report. """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('cases', nargs='*',
+                        help='cases to run, of %s (default: all)' % (
+                            ', '.join(CASES),))
+    parser.add_argument('-o', '--output',
+                        help='write the JSON report here (default: stdout)')
+    parser.add_argument('-c', '--compare', metavar='OLD_JSON',
+                        help='report changes from an earlier report')
+    parser.add_argument('-q', '--quick', action='store_true',
+                        help='run at sizes %s only' % (QUICK_SIZES,))
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='runs of each case, of which the best is kept')
+    parser.add_argument('-t', '--min-time', type=float, default=0.2,
+                        help='least seconds taken by each run')
+    args = parser.parse_args(argv)
+    for case in args.cases:
+        if case not in CASES:
+            parser.error("unknown case '%s'" % case)
+
+    cases = args.cases or CASES
+    sizes = QUICK_SIZES if args.quick else SIZES
+    report = {
+        'optionz': optionz.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': args.repeat,
+        'min_time': args.min_time,
+        'results': run(cases, sizes, args.repeat, args.min_time),
+    }
+    if args.compare:
+        compare(report['results'], args.compare)
+    text = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,8 @@ setup(name='optionz',
       author_email='jddixon@gmail.com',
       long_description=LONG_DESC,
       packages=['optionz'],
+      # the package's module __getattr__() needs 3.7 (PEP 562)
+      python_requires='>=3.7',
       package_dir={'': 'src'},
       py_modules=[],
       include_package_data=False,
@@ -29,9 +31,12 @@ setup(name='optionz',
           'Intended Audience :: Developers',
           'License :: OSI Approved :: MIT License',
           'Natural Language :: English',
-          'Programming Language :: Python 2.7',
-          'Programming Language :: Python 3.5',
-          'Programming Language :: Python 3.6',
           'Programming Language :: Python 3.7',
+          'Programming Language :: Python 3.8',
+          'Programming Language :: Python 3.9',
+          'Programming Language :: Python 3.10',
+          'Programming Language :: Python 3.11',
+          'Programming Language :: Python 3.12',
+          'Programming Language :: Python 3.13',
           'Topic :: Software Development :: Libraries :: Python Modules',
       ],)
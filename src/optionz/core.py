@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# optionz/optionz/core.py
+
+""" The exception, value types and result class shared by all of optionz. """
+
+import enum
+import operator
+import weakref
+
+__all__ = ['SUBCOMMAND_FIELDS', 'OptionzError', 'OptionzResult', 'ValType']
+
+# result fields added to specs with subcommands
+SUBCOMMAND_FIELDS = ('subcommand', 'sub_options')
+
+
+class OptionzError(RuntimeError):
+    """ Optionz-related exceptions class. """
+    pass
+
+
+def _is_tag(token):
+    """
+    Whether a token looks like an option tag rather than a value.
+    Negative numbers and a lone dash are values.
+    """
+    return len(token) > 1 and token[0] == '-' and \
+        token[1] not in '0123456789.'
+
+
+class ValType(enum.IntEnum):
+    """ Enumerate argument types currently supported. """
+    BOOL = 1
+    CHOICE = 2
+    FLOAT = 3
+    INT = 4
+    LIST = 5
+    STR = 6
+
+
+class OptionzResult(tuple):
+    """
+    Base class for parse results: an immutable tuple whose fields can
+    also be read as attributes.  Each compiled specification generates
+    one subclass, so instances carry no per-instance dictionary.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    def _make(cls, values):
+        """ Build an instance from an iterable of field values. """
+        return tuple.__new__(cls, values)
+
+    def _asdict(self):
+        """ Return a new dictionary mapping field names to values. """
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        # numeric lists are memoryviews, shown by their numbers
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (field, value.tolist()
+                       if isinstance(value, memoryview) else value)
+            for field, value in zip(self._fields, self)))
+
+    def __reduce__(self):
+        """
+        Pickle as the spec name, field names and values, numeric lists
+        being sent as (position, typecode, bytes), since the generated
+        class can't be found by name and memoryviews can't be pickled.
+        """
+        values = list(self)
+        arrays = []
+        for ndx, value in enumerate(values):
+            if isinstance(value, memoryview):
+                arrays.append((ndx, value.format, value.tobytes()))
+                values[ndx] = None
+        return (_rebuild_result, (type(self).__name__, self._fields,
+                                  tuple(values), tuple(arrays)))
+
+
+# generated result classes by (name, fields); see _make_result_class()
+_RESULT_CLASSES = weakref.WeakValueDictionary()
+
+
+def _make_result_class(name, fields):
+    """
+    Generate the OptionzResult subclass for a specification, with a
+    read-only property per field.  Classes are shared by specifications
+    with the same name and fields, and found again when unpickling.
+    """
+    fields = tuple(fields)
+    cls = _RESULT_CLASSES.get((name, fields))
+    if cls is None:
+        namespace = {'__slots__': (), '_fields': fields}
+        for ndx, field in enumerate(fields):
+            if field.startswith('_') and hasattr(OptionzResult, field):
+                raise OptionzError("option name '%s' is reserved" % field)
+            namespace[field] = property(operator.itemgetter(ndx),
+                                        doc="value of option '%s'" % field)
+        cls = _RESULT_CLASSES.setdefault(
+            (name, fields), type(name, (OptionzResult,), namespace))
+    return cls
+
+
+def _rebuild_result(name, fields, values, arrays):
+    """ Rebuild a result pickled by OptionzResult.__reduce__(). """
+    values = list(values)
+    for ndx, typecode, data in arrays:
+        values[ndx] = memoryview(data).cast(typecode)
+    return tuple.__new__(_make_result_class(name, fields), values)
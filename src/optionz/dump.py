@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# optionz/optionz/dump.py
+
+""" Dumping and comparing options, as text tables and other formats. """
+
+import collections
+import io
+import operator
+
+from .core import OptionzResult
+
+__all__ = ['DIFF_EXACT_LIMIT', 'DUMP_CHUNK', 'DUMP_FORMATS', 'JUST_HEADERS',
+           'MISSING_CELL', 'OptionDiff',
+           'diff_options', 'dump_diff', 'dump_options', 'dump_options_many',
+           'dump_options_to', 'iter_dump_options', 'iter_dump_options_many', ]
+
+JUST_HEADERS = 'OPTION VALUE\n'
+
+# conversion used in dumping a value of a given type
+_VALUE_CONVERSIONS = {str: '%s', bool: '%s', int: '%d', float: '%f'}
+
+# formats understood by dump_options()
+DUMP_FORMATS = ('table', 'jsonl', 'csv', 'tsv')
+
+# types of list values in parse results
+_RESULT_LIST_TYPES = (list, tuple, memoryview)
+
+# key sorting (name, value) pairs by name
+_NAME_OF = operator.itemgetter(0)
+
+# list values joined into each chunk yielded by iter_dump_options()
+DUMP_CHUNK = 4096
+
+
+def _conversion(value):
+    """ Return the % conversion used to dump value. """
+    conv = _VALUE_CONVERSIONS.get(type(value))
+    if conv is None:
+        # subclasses, as well as anything else
+        if isinstance(value, (str, bool)):
+            conv = '%s'
+        elif isinstance(value, int):
+            conv = '%d'
+        elif isinstance(value, float):
+            conv = '%f'
+        else:
+            conv = '%s'
+    return conv
+
+
+def _iter_list_columns(rhs, columns, width):
+    """
+    Generate lines laying out the values in rhs in aligned columns,
+    filling each row before starting the next.  Each value is formatted
+    once, and the column width is taken in the same pass.
+    """
+    texts = []
+    widest = 0
+    for value in rhs:
+        text = _conversion(value) % (value,)
+        if len(text) > widest:
+            widest = len(text)
+        texts.append(text)
+
+    if columns == 'auto':
+        if width is None:
+            # loaded here, as few dumps ask for the terminal width
+            import shutil
+            width = shutil.get_terminal_size().columns
+        # four spaces of indent, then columns separated by two spaces
+        columns = max(1, (width - 4 + 2) // (widest + 2))
+    # about DUMP_CHUNK values per chunk, always whole rows
+    per_chunk = columns * max(1, DUMP_CHUNK // columns)
+    for ndx in range(0, len(texts), per_chunk):
+        block = texts[ndx:ndx + per_chunk]
+        yield ''.join([
+            '    ' + '  '.join([text.ljust(widest)
+                                for text in block[row:row + columns]
+                                ]).rstrip() + '\n'
+            for row in range(0, len(block), columns)])
+
+
+def _split_pairs(ns_, prefix, scalar_pairs, list_pairs):
+    """
+    Add the (name, value) pairs of a Namespace or a parse result to
+    scalar_pairs or list_pairs.  In a parse result, list values are
+    tuples or, for numbers, memoryviews, and a nested result, like the
+    sub_options of a subcommand, adds its own pairs under dotted names
+    such as 'sub_options.jobs'.
+    """
+    if isinstance(ns_, OptionzResult):
+        items = zip(ns_._fields, ns_)
+        list_types = _RESULT_LIST_TYPES
+    else:
+        items = ns_.__dict__.items()
+        list_types = list
+
+    # We expect only pairs whose LHS is a string and whose RHIS is either
+    # a scalar (int, float, str) or a list.  Those with list values are
+    # handled separately.
+
+    for lhs, rhs in items:
+        if isinstance(rhs, OptionzResult):
+            _split_pairs(rhs, prefix + lhs + '.', scalar_pairs, list_pairs)
+        elif isinstance(rhs, list_types):
+            list_pairs.append((prefix + lhs, rhs))
+        else:
+            scalar_pairs.append((prefix + lhs, rhs))
+
+
+def _split_options(ns_):
+    """ Return the sorted (scalar_pairs, list_pairs) of ns_. """
+    scalar_pairs = []
+    list_pairs = []
+    if ns_ is not None:
+        _split_pairs(ns_, '', scalar_pairs, list_pairs)
+        scalar_pairs.sort(key=_NAME_OF)
+        list_pairs.sort(key=_NAME_OF)
+    return scalar_pairs, list_pairs
+
+
+def _iter_dump_table(scalar_pairs, list_pairs, with_headers, columns, width):
+    """ Generate the human-readable table in chunks. """
+    if not scalar_pairs and not list_pairs:
+        if with_headers:
+            yield JUST_HEADERS
+        return
+
+    width_lhs = 0
+    if with_headers:
+        width_lhs = 6           # for the word 'OPTION'
+    for lhs, _ in scalar_pairs:
+        if len(lhs) > width_lhs:
+            width_lhs = len(lhs)
+
+    lhs_fmt = "%%-%ds " % width_lhs
+    scalar_fmts = {conv: lhs_fmt + conv + '\n' for conv in ('%s', '%d', '%f')}
+    list_fmts = {conv: '    ' + conv + '\n' for conv in ('%s', '%d', '%f')}
+
+    head = [lhs_fmt % 'OPTION' + 'VALUE\n'] if with_headers else []
+    yield ''.join(head + [scalar_fmts[_conversion(rhs)] % (lhs, rhs)
+                          for lhs, rhs in scalar_pairs])
+
+    for lhs, rhs in list_pairs:
+        yield ('\n' + lhs + 'S:').upper() + '\n'
+        if columns is not None:
+            yield from _iter_list_columns(rhs, columns, width)
+            continue
+        for ndx in range(0, len(rhs), DUMP_CHUNK):
+            yield ''.join([list_fmts[_conversion(value)] % (value,)
+                           for value in rhs[ndx:ndx + DUMP_CHUNK]])
+
+
+def _json_default(value):
+    """ Represent numeric list values as arrays, anything else as str. """
+    if isinstance(value, memoryview):
+        return value.tolist()
+    return str(value)
+
+
+def _iter_dump_jsonl(scalar_pairs, list_pairs):
+    """
+    Generate one JSON object per option, scalars first; a list value
+    becomes a JSON array.  Values JSON can't represent are written as
+    strings.
+    """
+    # the format modules are only loaded when their format is dumped
+    import json
+    encode = json.JSONEncoder(default=_json_default).encode
+    for pairs in (scalar_pairs, list_pairs):
+        for ndx in range(0, len(pairs), DUMP_CHUNK):
+            yield ''.join([
+                encode({'option': lhs, 'value': rhs}) + '\n'
+                for lhs, rhs in pairs[ndx:ndx + DUMP_CHUNK]])
+
+
+def _iter_dump_delimited(scalar_pairs, list_pairs, with_headers, delimiter):
+    """
+    Generate CSV or TSV rows of (option, value), scalars first.  As in
+    the table, each element of a list value gets a row of its own.
+    """
+    import csv
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=delimiter, lineterminator='\n')
+    if with_headers:
+        writer.writerow(('OPTION', 'VALUE'))
+    writer.writerows(scalar_pairs)
+    yield buf.getvalue()
+    for lhs, rhs in list_pairs:
+        for ndx in range(0, len(rhs), DUMP_CHUNK):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows([(lhs, value)
+                              for value in rhs[ndx:ndx + DUMP_CHUNK]])
+            yield buf.getvalue()
+
+
+# pylint: disable=redefined-builtin
+def iter_dump_options(ns_, with_headers=True, columns=None, width=None,
+                      format='table'):
+    """
+    Generate the text of dump_options() in chunks, so that it can be
+    written out without ever being held in memory all at once.  The
+    width of the option column is found in a single pass over the
+    options, and one format is prepared per kind of value.
+    """
+    if format not in DUMP_FORMATS:
+        raise ValueError("unknown dump format '%s'" % format)
+    if columns is not None and columns != 'auto' and \
+            (not isinstance(columns, int) or columns < 1):
+        raise ValueError("columns must be 'auto' or a positive int")
+    scalar_pairs, list_pairs = _split_options(ns_)
+
+    if format == 'table':
+        yield from _iter_dump_table(scalar_pairs, list_pairs, with_headers,
+                                    columns, width)
+    elif format == 'jsonl':
+        yield from _iter_dump_jsonl(scalar_pairs, list_pairs)
+    else:
+        yield from _iter_dump_delimited(
+            scalar_pairs, list_pairs, with_headers,
+            ',' if format == 'csv' else '\t')
+
+
+def dump_options_to(file, ns_, with_headers=True, columns=None, width=None,
+                    format='table'):
+    """
+    Write the output of dump_options() to a file-like object chunk by
+    chunk, never building the whole text.
+    """
+    for chunk in iter_dump_options(ns_, with_headers, columns, width,
+                                   format):
+        file.write(chunk)
+
+
+def dump_options(ns_, with_headers=True, columns=None, width=None,
+                 format='table'):
+    """
+    Serialize Namespace for output as sorted, formatted list.
+
+    This is an aid for use with argparse's ArgumentParser, which
+    outputs Namespaces.  It prints a table of options and their values,
+    breaking out any list values to be tabulated separately.
+
+    If with_headers, precede the table of options with an
+      OPTION VALUE
+    line.
+
+    By default list values are listed one per line.  If columns is a
+    positive int, they are instead packed into that many aligned columns;
+    if it is 'auto', into as many columns as fit in width characters,
+    which defaults to the width of the terminal.
+
+    ns_ may also be a result returned by parsing with an Optionz, and
+    format may be one of the machine-readable 'jsonl', 'csv' or 'tsv',
+    which give one row per option (one per list element for CSV and
+    TSV).  Only CSV and TSV have a header row.
+    """
+    return ''.join(iter_dump_options(ns_, with_headers, columns, width,
+                                     format))
+# pylint: enable=redefined-builtin
+
+
+MISSING_CELL = '-'          # option not present in a run
+
+
+def _option_dict(ns_):
+    """
+    Return the option values of a Namespace or a parse result, with
+    those of nested results under dotted names; see _split_pairs().
+    """
+    scalar_pairs, list_pairs = [], []
+    _split_pairs(ns_, '', scalar_pairs, list_pairs)
+    return dict(scalar_pairs + list_pairs)
+
+
+def _cell(value):
+    """ Format a value for a cell; list elements are comma-separated. """
+    if isinstance(value, _RESULT_LIST_TYPES):
+        return ','.join([_conversion(elm) % (elm,) for elm in value])
+    return _conversion(value) % (value,)
+
+
+def iter_dump_options_many(namespaces, labels=None, with_headers=True):
+    """
+    Generate, row by row, a table comparing many Namespaces or parse
+    results: one row per option and one column per run.  A single pass
+    over the runs gathers the union of option names and the width of
+    every column; rows are then formatted as they are yielded, so
+    they are never all held at once.  Options missing from a run are
+    shown as MISSING_CELL.
+    """
+    namespaces = list(namespaces)
+    if labels is None:
+        labels = [str(ndx) for ndx in range(len(namespaces))]
+    elif len(labels) != len(namespaces):
+        raise ValueError("%d labels for %d runs" % (
+            len(labels), len(namespaces)))
+
+    dicts = []
+    keys = set()
+    width_lhs = 6 if with_headers else 0
+    widths = []
+    for ndx, ns_ in enumerate(namespaces):
+        options = _option_dict(ns_) if ns_ is not None else {}
+        dicts.append(options)
+        keys.update(options)
+        widest = len(labels[ndx]) if with_headers else 0
+        for value in options.values():
+            cell = _cell(value)
+            if len(cell) > widest:
+                widest = len(cell)
+        widths.append(widest)
+    for key in keys:
+        if len(key) > width_lhs:
+            width_lhs = len(key)
+    for ndx, options in enumerate(dicts):
+        if len(options) < len(keys):
+            widths[ndx] = max(widths[ndx], len(MISSING_CELL))
+
+    if with_headers:
+        yield ' '.join(['OPTION'.ljust(width_lhs)] + [
+            label.ljust(wid) for label, wid in zip(labels, widths)
+        ]).rstrip() + '\n'
+    for key in sorted(keys):
+        yield ' '.join([key.ljust(width_lhs)] + [
+            (_cell(options[key]) if key in options else MISSING_CELL).ljust(
+                wid) for options, wid in zip(dicts, widths)
+        ]).rstrip() + '\n'
+
+
+def dump_options_many(namespaces, labels=None, with_headers=True):
+    """
+    Return a single aligned table comparing the options of many runs;
+    see iter_dump_options_many().
+    """
+    return ''.join(iter_dump_options_many(namespaces, labels, with_headers))
+
+
+# an element-by-element diff is used for lists only while the product of
+# the lengths of their differing middles is no larger than this
+DIFF_EXACT_LIMIT = 1 << 20
+
+OptionDiff = collections.namedtuple(
+    'OptionDiff', ['option', 'change', 'old', 'new', 'edits'])
+OptionDiff.__doc__ = """
+A difference between two sets of options.  change is 'added',
+'removed' or 'changed'.  For changed list values, edits is a list of
+(op, position, values) triples, where op is '-' for values removed from
+the old list at that position or '+' for values inserted at that
+position in the new list.  position is None if the lists were too long
+and too different to align, in which case the values simply are those
+present more often in one list than in the other.  Otherwise edits is
+None.
+"""
+
+
+def _diff_lists(old, new):
+    """
+    Return the edits turning the list old into new.  A common prefix
+    and suffix are trimmed in linear time; what remains is aligned with
+    difflib if it is small enough, and compared as multisets otherwise,
+    so that huge lists never cost quadratic time.
+    """
+    count = min(len(old), len(new))
+    start = 0
+    while start < count and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and \
+            old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    mid_old = old[start:end_old]
+    mid_new = new[start:end_new]
+
+    edits = []
+    if len(mid_old) * len(mid_new) <= DIFF_EXACT_LIMIT:
+        # only small lists get aligned, so difflib is rarely needed
+        import difflib
+        matcher = difflib.SequenceMatcher(None, mid_old, mid_new, False)
+        for tag, i_1, i_2, j_1, j_2 in matcher.get_opcodes():
+            if tag in ('delete', 'replace'):
+                edits.append(('-', start + i_1, tuple(mid_old[i_1:i_2])))
+            if tag in ('insert', 'replace'):
+                edits.append(('+', start + j_1, tuple(mid_new[j_1:j_2])))
+    else:
+        old_counts = collections.Counter(mid_old)
+        new_counts = collections.Counter(mid_new)
+        removed = old_counts - new_counts
+        added = new_counts - old_counts
+        if removed:
+            edits.append(('-', None, tuple(removed.elements())))
+        if added:
+            edits.append(('+', None, tuple(added.elements())))
+    return edits
+
+
+def diff_options(ns_a, ns_b):
+    """
+    Compare two Namespaces or parse results, returning a list of
+    OptionDiff sorted by option name.  The sorted option names of the
+    two are merged in a single linear walk.
+    """
+    dict_a = _option_dict(ns_a) if ns_a is not None else {}
+    dict_b = _option_dict(ns_b) if ns_b is not None else {}
+    keys_a = sorted(dict_a)
+    keys_b = sorted(dict_b)
+    diffs = []
+    ndx_a = ndx_b = 0
+    while ndx_a < len(keys_a) or ndx_b < len(keys_b):
+        key_a = keys_a[ndx_a] if ndx_a < len(keys_a) else None
+        key_b = keys_b[ndx_b] if ndx_b < len(keys_b) else None
+        if key_b is None or (key_a is not None and key_a < key_b):
+            diffs.append(OptionDiff(key_a, 'removed', dict_a[key_a],
+                                    None, None))
+            ndx_a += 1
+        elif key_a is None or key_b < key_a:
+            diffs.append(OptionDiff(key_b, 'added', None, dict_b[key_b],
+                                    None))
+            ndx_b += 1
+        else:
+            old, new = dict_a[key_a], dict_b[key_b]
+            if isinstance(old, _RESULT_LIST_TYPES) and \
+                    isinstance(new, _RESULT_LIST_TYPES):
+                edits = _diff_lists(old, new)
+                if edits:
+                    diffs.append(OptionDiff(key_a, 'changed', old, new,
+                                            edits))
+            elif old != new:
+                diffs.append(OptionDiff(key_a, 'changed', old, new, None))
+            ndx_a += 1
+            ndx_b += 1
+    return diffs
+
+
+def dump_diff(diffs, with_headers=True):
+    """
+    Format the output of diff_options() as a table in the style of
+    dump_options().  Rows are marked '-' for removed options, '+' for
+    added ones and '~' for changed values.  Edits to list values follow,
+    one value per line, each with its position in the old ('-') or new
+    ('+') list.
+    """
+    marks = {'removed': '-', 'added': '+', 'changed': '~'}
+    rows = [diff for diff in diffs if diff.edits is None]
+    width_lhs = 6 if with_headers else 0
+    width_old = 3 if with_headers else 0
+    for diff in rows:
+        width_lhs = max(width_lhs, len(diff.option))
+        if diff.change != 'added':
+            width_old = max(width_old, len(_cell(diff.old)))
+
+    output = []
+    if with_headers:
+        output.append(('  %-*s %-*s NEW' % (
+            width_lhs, 'OPTION', width_old, 'OLD')).rstrip())
+    for diff in rows:
+        old = _cell(diff.old) if diff.change != 'added' else ''
+        new = _cell(diff.new) if diff.change != 'removed' else ''
+        output.append(('%s %-*s %-*s %s' % (
+            marks[diff.change], width_lhs, diff.option,
+            width_old, old, new)).rstrip())
+
+    for diff in diffs:
+        if diff.edits is None:
+            continue
+        output.append(('\n~ ' + diff.option + 'S:').upper())
+        for op_, position, values in diff.edits:
+            where = '?' if position is None else str(position)
+            for offset, value in enumerate(values):
+                if position is not None:
+                    where = str(position + offset)
+                output.append('    %s %s %s' % (op_, where, _cell(value)))
+
+    return '\n'.join(output) + '\n' if output else ''
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# optionz/optionz/meta.py
+
+""" EXPERIMENTAL metaclasses and option carriers. """
+
+import threading
+import weakref
+
+__all__ = ['Immutable', 'MetaOption', 'Option', 'Singleton', 'optionz_maker']
+
+
+# held only while a singleton is first built, never to look one up
+_SINGLETON_LOCK = threading.RLock()
+
+
+class Singleton(type):
+    """
+    Classes derived from this metaclass will indeed be singletons.
+
+    The first call builds the instance under a lock, so concurrent
+    callers all get the same object; later calls find it in the class
+    dictionary without locking.  Each class, including any subclass of
+    a singleton, has its own instance.
+    """
+    _instance = None
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            with _SINGLETON_LOCK:
+                instance = cls.__dict__.get('_instance')
+                if instance is None:
+                    instance = super().__call__(*args, **kwargs)
+                    # bypass any __setattr__ which makes the class immutable
+                    type.__setattr__(cls, '_instance', instance)
+        return instance
+
+
+class Immutable(object):
+    """ Define immutable class/object -- currently unused. """
+
+    def __setattr__(self, name, value):
+        """ Overrides standard function. """
+        raise AttributeError("attempt to change immutable value")
+
+
+class MetaOption(type):
+    """
+    Metaclass for Option: keyword arguments in the class statement
+    become class attributes, which may not then be changed.
+    """
+
+    @classmethod
+    def __prepare__(mcs, name, bases, **kwargs):
+        """
+        Here we use kwargs to set attributes of the class.  Need to
+        return a dictionary-like object.
+        """
+        return dict(kwargs)
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        """
+        Creates the class.  kwargs are already in the namespace, so
+        omit them from the call to type.__new__().
+        """
+        return type.__new__(mcs, name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        """
+        Omit kwargs from call to __init__().
+        """
+        super().__init__(name, bases, namespace)
+
+    def __setattr__(cls, key, value):
+        raise AttributeError("attempt to change immutable value")
+
+# def attrSetter(self, key, value):
+#    raise AttributeError("attempt to change immutable value")
+
+
+class _SingletonOption(Singleton, MetaOption):
+    """ Metaclass for the immutable singletons made by optionz_maker(). """
+    pass
+
+
+# classes made by optionz_maker(), by canonical keyword arguments
+_MAKER_CACHE = weakref.WeakValueDictionary()
+
+
+def optionz_maker(**kwargs):
+    """
+    Return an Options class whose single, immutable instance has the
+    keyword arguments as attributes.  Calls with equal arguments of the
+    same types return the same class for as long as it is in use.
+    """
+    try:
+        key = tuple(sorted((name, type(value), value)
+                           for name, value in kwargs.items()))
+        cls = _MAKER_CACHE.get(key)
+    except TypeError:
+        # some value can't be hashed
+        key, cls = None, None
+    if cls is None:
+        # attributes live in the class; instances have no __dict__
+        cls = _SingletonOption('MyOptions', (), dict(kwargs, __slots__=()))
+        if key is not None:
+            cls = _MAKER_CACHE.setdefault(key, cls)
+    return cls
+
+#####################################################################
+# NOTE EVEN MORE PROVISIONAL
+#####################################################################
+
+
+class _BaseOption(object):
+    """ Unused base class for options. """
+    pass
+
+
+class Option(_BaseOption):
+    """
+    Carrier for a collection of what we hope are immutable key-value
+    pairs.  These are passed to the constructor as kwargs.
+    """
+
+    def __init__(self, **kwargs):
+        for name in kwargs:
+            setattr(self, name, kwargs[name])
+
+    def __eq__(self, other):
+        if not other or not isinstance(other, _BaseOption):
+            return False
+        return self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None         # since we have defined __eq__
+
+    def __contains__(self, key):
+        return key in self.__dict__
+
+# END EVEN MORE PROVISIONAL #########################################
@@ -0,0 +1,1115 @@
+#!/usr/bin/env python3
+# optionz/optionz/parser.py
+
+""" The parser engine: specifications compiled into dispatch tables. """
+
+import array
+import bisect
+import collections
+import contextlib
+import hashlib
+import importlib
+import itertools
+import marshal
+import mmap
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+
+from .core import OptionzError, ValType, _is_tag, _make_result_class
+from .spec import CACHE_EXT, Optionz
+
+__all__ = ['ARG_FILE_DEPTH', 'ARG_FILE_MAX_SIZE', 'ARG_FILE_PREFIX',
+           'CACHE_VERSION', 'MMAP_THRESHOLD', 'PARSE_CACHE_SIZE',
+           'PARSE_PHASES', 'SUGGEST_DISTANCE', 'CompiledOptionz',
+           'ParseCacheInfo', 'ParseTrace', 'ParseTracer',
+           'expand_arg_files', 'iter_tokenize', 'tokenize', ]
+
+CACHE_VERSION = 4           # bump when the table layout changes
+
+
+# how a handler consumes the tokens following its tag
+_FLAG = 0
+_SCALAR = 1
+_LIST = 2
+_ARRAY = 3          # a list of numbers, converted in bulk
+
+# a handler's converter as saved on disk; choice converters, saved as
+# -1, are rebuilt from the option's choices
+_CONVERTERS = (None, str, int, float)
+_CONVERTER_CODES = {convert: code for code, convert in enumerate(_CONVERTERS)}
+
+# array.array typecodes for numeric list items
+_ARRAY_TYPECODES = {ValType.INT: 'q', ValType.FLOAT: 'd'}
+
+
+def _frozen(items):
+    """
+    Return a read-only memoryview of the numbers in the array items,
+    over an immutable copy of their bytes, so that nothing mutable can
+    be reached from a result.
+    """
+    return memoryview(items.tobytes()).cast(items.typecode)
+
+
+def _choice_converter(choices):
+    """
+    Return a validator mapping the text of a choice to the choice itself,
+    so that non-string choices can be given on the command line, with
+    one hashed lookup per value.
+    """
+    lookup = {str(choice): choice for choice in reversed(choices)}
+
+    def convert(text):
+        """ Return the choice whose text this is. """
+        try:
+            return lookup[text]
+        except KeyError:
+            raise ValueError("'%s' is not one of %s" % (text, list(choices)))
+    return convert
+
+
+# tokenizing command lines ---------------------------------------
+
+# Words are separated by runs of delimiters (spaces and tabs); quoted
+# strings are taken as they are, without the quotes, and join any text
+# they touch.  An unmatched quote is an error.
+_SCANNER = re.compile(r"""[ \t]+|((?:[^ \t'"]+|"[^"]*"|'[^']*')+)|(.)""")
+_QUOTED = re.compile(r"""([^'"]+)|"([^"]*)"|'([^']*)'""")
+
+
+def iter_tokenize(text):
+    """
+    Generate the words of a command line, as described in README.md,
+    in a single pass over text.
+    """
+    for match in _SCANNER.finditer(text):
+        word = match.group(1)
+        if word is None:
+            if match.group(2) is not None:
+                raise OptionzError("unmatched quote at position %d of %r" % (
+                    match.start(2), text))
+            continue                    # delimiters
+        if '"' in word or "'" in word:
+            word = ''.join([plain or dbl or sgl or ''
+                            for plain, dbl, sgl in _QUOTED.findall(word)])
+        yield word
+
+
+def tokenize(text):
+    """
+    Split a command line into a list of words: a faster shlex.split()
+    following the simpler rules of README.md.  Runs of spaces and tabs
+    separate words; singly- and doubly-quoted strings are left
+    untouched apart from losing their quotes.
+    """
+    return list(iter_tokenize(text))
+
+
+# @file argument files ------------------------------------------
+
+ARG_FILE_PREFIX = '@'
+ARG_FILE_DEPTH = 8              # how deeply argument files may nest
+ARG_FILE_MAX_SIZE = 1 << 30     # total bytes read in one expansion
+MMAP_THRESHOLD = 1 << 20        # larger argument files are memory-mapped
+_LINES_BLOCK = 1 << 18          # bytes of an argument file split at once
+
+
+def _iter_blocks(data):
+    """
+    Generate the non-empty lines of a bytes-like object as lists, one
+    per block decoded and split at a time, so that a memory-mapped file
+    is never read into memory as a whole.  Each list comes with whether
+    any of its lines may be an argument file.
+    """
+    size = len(data)
+    start = 0
+    while start < size:
+        stop = size
+        if start + _LINES_BLOCK < size:
+            # end the block at a newline, so that no line, nor any
+            # character, is split between blocks
+            cut = data.rfind(b'\n', start, start + _LINES_BLOCK)
+            if cut < 0:
+                cut = data.find(b'\n', start + _LINES_BLOCK)
+            if cut >= 0:
+                stop = cut + 1
+        text = data[start:stop].decode('utf-8')
+        start = stop
+        lines = text.split('\n')
+        if '\r' in text:
+            lines = [line[:-1] if line.endswith('\r') else line
+                     for line in lines]
+        yield (list(filter(None, lines)),
+               text.startswith(ARG_FILE_PREFIX) or
+               '\n' + ARG_FILE_PREFIX in text)
+
+
+def _iter_arg_file(path):
+    """
+    Generate the arguments in a file, one per line, in blocks as from
+    _iter_blocks().  Large files are memory-mapped, so their text is
+    never read into memory as a whole.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return
+        if size < MMAP_THRESHOLD:
+            yield from _iter_blocks(file.read())
+        else:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from _iter_blocks(data)
+
+
+def expand_arg_files(args, max_depth=ARG_FILE_DEPTH,
+                     max_size=ARG_FILE_MAX_SIZE):
+    """
+    Generate args, replacing each '@path' with the arguments in the file
+    at path, one per line; argument files may themselves contain '@path'
+    arguments, nested up to max_depth deep.  OptionzError is raised if
+    files can't be read, nest too deeply, or together exceed max_size
+    bytes.  Expansion is lazy: files are opened only as the generator
+    reaches them.
+    """
+    total = [0]
+
+    def expand(tokens, depth):
+        """ Expand the argument files among tokens. """
+        for token in tokens:
+            if len(token) < 2 or token[0] != ARG_FILE_PREFIX:
+                yield token
+                continue
+            if depth >= max_depth:
+                raise OptionzError(
+                    "argument files nested more than %d deep at '%s'" % (
+                        max_depth, token))
+            path = token[1:]
+            try:
+                total[0] += os.path.getsize(path)
+                if total[0] > max_size:
+                    raise OptionzError(
+                        "argument files exceed %d bytes at '%s'" % (
+                            max_size, token))
+                for lines, nested in _iter_arg_file(path):
+                    if nested:
+                        yield from expand(lines, depth + 1)
+                    else:
+                        yield from lines
+            except (OSError, UnicodeDecodeError) as exc:
+                raise OptionzError("can't read argument file '%s': %s" % (
+                    path, exc))
+
+    return expand(args, 0)
+
+
+# suggesting tags -----------------------------------------------
+
+SUGGEST_DISTANCE = 2        # furthest a suggested tag may be from a typo
+
+
+def _deletions(word):
+    """ Return word and every string made by deleting one character. """
+    keys = {word}
+    keys.update(word[:ndx] + word[ndx + 1:] for ndx in range(len(word)))
+    return keys
+
+
+def _edit_distance(word_a, word_b):
+    """
+    Return the optimal string alignment distance between two words:
+    the number of insertions, deletions, substitutions and
+    transpositions of adjacent characters needed to turn one into the
+    other.
+    """
+    prev2 = None
+    prev = list(range(len(word_b) + 1))
+    for i, char_a in enumerate(word_a, 1):
+        cur = [i] + [0] * len(word_b)
+        for j, char_b in enumerate(word_b, 1):
+            cost = 0 if char_a == char_b else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and \
+                    char_a == word_b[j - 2] and word_a[i - 2] == char_b:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+# memoized parse results ----------------------------------------
+
+PARSE_CACHE_SIZE = 1024     # default cap on memoized argument vectors
+
+ParseCacheInfo = collections.namedtuple(
+    'ParseCacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+ParseCacheInfo.__doc__ = """
+Statistics for a CompiledOptionz's cache of parse results: lookups
+answered from the cache, lookups which were not, results dropped to
+stay within maxsize, and the number of results now cached.
+"""
+
+
+# tracing the phases of a parse ---------------------------------
+
+PARSE_PHASES = ('tokenize', 'lookup', 'convert', 'validate', 'construct')
+_TOKENIZE, _LOOKUP, _CONVERT, _VALIDATE, _CONSTRUCT = range(5)
+
+ParseTrace = collections.namedtuple(
+    'ParseTrace', ['args', 'times', 'blocks', 'error'])
+ParseTrace.__doc__ = """
+The cost of one traced parse: times and blocks map each of PARSE_PHASES
+to the nanoseconds spent in it and the net number of memory blocks it
+allocated.  error is the OptionzError raised, if the parse failed.
+"""
+
+
+class _PhaseClock(object):
+    """ The cost of each phase of one parse in progress. """
+
+    __slots__ = ('times', 'blocks', '_clock', '_count_blocks', '_then',
+                 '_then_blocks')
+
+    def __init__(self, clock, count_blocks):
+        self.times = [0] * len(PARSE_PHASES)
+        self.blocks = [0] * len(PARSE_PHASES)
+        self._clock = clock
+        self._count_blocks = count_blocks
+        self._then_blocks = count_blocks()
+        self._then = clock()
+
+    def mark(self, phase):
+        """ Charge everything since the last mark to phase. """
+        now = self._clock()
+        self.times[phase] += now - self._then
+        blocks = self._count_blocks()
+        self.blocks[phase] += blocks - self._then_blocks
+        self._then_blocks = blocks
+        self._then = self._clock()      # not counting the mark itself
+
+
+class ParseTracer(object):
+    """
+    Collects the time and net memory blocks allocated in each phase of
+    parsing, per parse and in total, while installed by
+    CompiledOptionz.trace().  The phases are:
+
+        tokenize    expanding @files, classifying and splitting tokens
+        lookup      finding the option for each tag, or the subcommand
+        convert     converting values and storing them
+        validate    checking value counts and choices
+        construct   building the result
+
+    If callback is set, it is called with the ParseTrace of each parse
+    as it ends.  Counting blocks, through sys.getallocatedblocks(), may
+    be turned off with allocations=False.
+
+    A tracer may be shared by threads: each parse is timed on its own
+    clock, and only the totals are shared, under a lock.  Block counts
+    are for the whole process, so they include whatever other threads
+    allocate meanwhile.
+    """
+
+    def __init__(self, callback=None, allocations=True):
+        self._callback = callback
+        self._clock = time.perf_counter_ns
+        self._count_blocks = sys.getallocatedblocks if allocations else \
+            (lambda: 0)
+        self._lock = threading.Lock()
+        self._total_times = [0] * len(PARSE_PHASES)
+        self._total_blocks = [0] * len(PARSE_PHASES)
+        self.count = 0          # parses traced
+        self.failures = 0       # of which raised OptionzError
+        self.last = None        # ParseTrace of the latest parse
+
+    def _begin(self):
+        """ Start timing a parse, returning its clock. """
+        return _PhaseClock(self._clock, self._count_blocks)
+
+    def _end(self, clock, args, error):
+        """ Record the parse timed by clock. """
+        trace = ParseTrace(tuple(args), dict(zip(PARSE_PHASES, clock.times)),
+                           dict(zip(PARSE_PHASES, clock.blocks)), error)
+        with self._lock:
+            for phase in range(len(PARSE_PHASES)):
+                self._total_times[phase] += clock.times[phase]
+                self._total_blocks[phase] += clock.blocks[phase]
+            self.count += 1
+            if error is not None:
+                self.failures += 1
+            self.last = trace
+        if self._callback is not None:
+            self._callback(trace)
+
+    def times(self):
+        """ Return the total nanoseconds spent in each phase. """
+        with self._lock:
+            return dict(zip(PARSE_PHASES, self._total_times))
+
+    def blocks(self):
+        """ Return the total memory blocks allocated in each phase. """
+        with self._lock:
+            return dict(zip(PARSE_PHASES, self._total_blocks))
+
+
+def _take_list(handler, token, value, tokens, values, mark=None):
+    """
+    Gather the items of a list option in values, returning the token
+    which follows them, or None if there is none.  value is any item
+    attached to the tag itself; the rest are read from the iterator
+    tokens, up to the next tag or the option's limit.  Items given by
+    earlier uses of the tag count against the size limits.  If tracing,
+    gathering is charged to the convert phase and counting to validate,
+    through mark().
+    """
+    slot, kind, convert, extra = handler
+    min_count, max_count, typecode = extra
+    # items are gathered in a list, or numbers in a plain array with no
+    # list of boxed numbers, and frozen once the parse is done
+    items = values[slot]
+    if kind == _LIST:
+        if items.__class__ is not list:
+            items = values[slot] = []
+    elif items.__class__ is not array.array:
+        items = values[slot] = array.array(typecode)
+    if max_count is not None and len(items) >= max_count:
+        raise OptionzError("option '%s' takes at most %d values" % (
+            token, max_count))
+    append = items.append
+    try:
+        if value is not None:
+            append(convert(value))
+        # read no further than the room left
+        source = tokens if max_count is None else \
+            itertools.islice(tokens, max_count - len(items))
+        for item in source:
+            if _is_tag(item):
+                following = item
+                break
+            append(convert(item))
+        else:
+            following = next(tokens, None)
+    except (ValueError, OverflowError) as exc:
+        raise OptionzError("option '%s': %s" % (token, exc))
+    if mark is not None:
+        mark(_CONVERT)
+    if len(items) < min_count:
+        raise OptionzError("option '%s' requires %d values, got %d" % (
+            token, min_count, len(items)))
+    if mark is not None:
+        mark(_VALIDATE)
+    return following
+
+
+def _freeze_lists(values, slots):
+    """
+    Replace the items gathered at the given slots of values with their
+    immutable forms, ready for the result: lists become tuples, and
+    arrays of numbers read-only memoryviews.
+    """
+    for slot in slots:
+        items = values[slot]
+        if items.__class__ is list:
+            values[slot] = tuple(items)
+        elif items.__class__ is array.array:
+            values[slot] = _frozen(items)
+
+
+# bulk parsing in worker processes ------------------------------
+
+_WORKER_SPEC = None         # the CompiledOptionz of a worker process
+
+
+def _init_worker(tables):
+    """ Build the worker's copy of the spec, once per process. """
+    global _WORKER_SPEC
+    _WORKER_SPEC = CompiledOptionz(*tables)
+
+
+def _parse_in_worker(argvs, arg_files, errors):
+    """ Parse a chunk of argument vectors with the worker's spec. """
+    return _WORKER_SPEC._parse_chunk(argvs, arg_files, errors)
+
+
+class CompiledOptionz(object):
+    """
+    An Optionz specification frozen into dispatch tables.  Long and short
+    tags map directly to handlers carrying a precomputed converter, so
+    parse() does a constant amount of work per token.
+    """
+
+    def __init__(self, name, fields, defaults, specs, long_tags, short_tags,
+                 subcommands=None):
+        handlers = []
+        for ndx, (val_type, extra) in enumerate(specs):
+            if val_type == ValType.BOOL:
+                handlers.append((ndx, _FLAG, None, None))
+            elif val_type == ValType.LIST:
+                min_count, max_count, item_type = extra
+                if item_type == ValType.STR:
+                    handlers.append((ndx, _LIST, str, extra))
+                else:
+                    convert = int if item_type == ValType.INT else float
+                    handlers.append((ndx, _ARRAY, convert,
+                                     (min_count, max_count,
+                                      _ARRAY_TYPECODES[item_type])))
+            elif val_type == ValType.CHOICE:
+                handlers.append((ndx, _SCALAR, _choice_converter(extra),
+                                 None))
+            elif val_type == ValType.FLOAT:
+                handlers.append((ndx, _SCALAR, float, None))
+            elif val_type == ValType.INT:
+                handlers.append((ndx, _SCALAR, int, None))
+            else:
+                handlers.append((ndx, _SCALAR, str, None))
+        self._setup((name, fields, defaults, specs, long_tags, short_tags,
+                     subcommands or {}), handlers)
+
+    def _setup(self, tables, handlers, exact=None, sorted_tags=None):
+        """
+        Set up a new object from its tables, as passed to __init__(), and
+        the handler of each option.  The indexes exact, mapping whole tag
+        tokens to slots, and sorted_tags are derived unless given, as
+        they are by load().
+        """
+        (name, fields, defaults, specs, long_tags, short_tags,
+         subcommands) = tables
+        self._name = name
+        self._fields = fields
+        self._defaults = defaults   # as saved; see _initial for parse()
+        self._specs = specs
+        self._tags = (long_tags, short_tags)
+        self._subcommands = subcommands
+        self._sub_compiled = {}     # subcommands built so far
+        self._parse_cache = None    # see enable_parse_cache()
+        self._cache_counts = [0, 0, 0]      # hits, misses, evictions
+        self._cache_size = 0
+        self._result_class = _make_result_class(name, fields)
+
+        self._handlers = tuple(handlers)
+        initial = list(defaults)
+        for slot, kind, _, extra in handlers:
+            if kind == _ARRAY:
+                initial[slot] = _frozen(array.array(extra[2]))
+        self._initial = tuple(initial)
+        # slots of lists, gathered in mutable form while parsing
+        self._list_slots = tuple(slot for slot, kind, _, _ in handlers
+                                 if kind in (_LIST, _ARRAY))
+        self._long_tags = {tag: handlers[ndx]
+                           for tag, ndx in long_tags.items()}
+        self._short_tags = {tag: handlers[ndx]
+                            for tag, ndx in short_tags.items()}
+
+        # whole tokens '--tag' and '-c', matched with no slicing at all
+        if exact is None:
+            self._exact = {'--' + tag: handler
+                           for tag, handler in self._long_tags.items()}
+            self._exact.update(('-' + tag, handler)
+                               for tag, handler in self._short_tags.items())
+        else:
+            self._exact = {token: handlers[ndx]
+                           for token, ndx in exact.items()}
+        # long tags in order, for resolving abbreviations
+        if sorted_tags is None:
+            sorted_tags = sorted(long_tags)
+        self._sorted_tags = sorted_tags
+        # deletion neighbourhoods of long tags, see suggest()
+        self._deletions = None
+        # ASCII short tags indexed by character code, for clusters
+        self._short_table = [None] * 128
+        for tag, handler in self._short_tags.items():
+            if ord(tag) < 128:
+                self._short_table[ord(tag)] = handler
+
+    @property
+    def name(self):
+        """ Return the name of the compiled specification. """
+        return self._name
+
+    @property
+    def fields(self):
+        """ Return the option names, in declaration order. """
+        return self._fields
+
+    @property
+    def result_class(self):
+        """ Return the OptionzResult subclass generated for this spec. """
+        return self._result_class
+
+    def _tables(self):
+        """ Return the arguments from which this object was built. """
+        return (self._name, self._fields, self._defaults, self._specs) + \
+            self._tags + (self._subcommands,)
+
+    # on-disk cache -------------------------------------------------
+
+    def save(self, path):
+        """
+        Write the dispatch tables to path in marshal format, together
+        with the handlers and indexes derived from them, so that load()
+        need not derive them again.  Returns False, writing nothing, if
+        some default value or subcommand source can't be marshalled.
+        The file is written under a temporary name and then renamed, so
+        concurrent readers never see a partial file.
+        """
+        handlers = tuple(
+            (slot, kind, _CONVERTER_CODES.get(convert, -1), extra)
+            for slot, kind, convert, extra in self._handlers)
+        exact = {token: handler[0] for token, handler in self._exact.items()}
+        state = (CACHE_VERSION,) + self._tables() + \
+            (handlers, exact, self._sorted_tags)
+        try:
+            data = marshal.dumps(state)
+        except ValueError:
+            return False
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    @classmethod
+    def load(cls, path):
+        """
+        Rebuild a CompiledOptionz from tables written by save(), without
+        deriving its dispatch tables afresh.  Returns None if the file is
+        missing, unreadable, or from another version.
+        """
+        try:
+            with open(path, 'rb') as file:
+                state = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(state, tuple) or len(state) != 11 or \
+                state[0] != CACHE_VERSION:
+            return None
+        handlers = []
+        specs = state[4]
+        for slot, kind, code, extra in state[8]:
+            if code < 0:
+                convert = _choice_converter(specs[slot][1])
+            else:
+                convert = _CONVERTERS[code]
+            handlers.append((slot, kind, convert, extra))
+        compiled = cls.__new__(cls)
+        compiled._setup(state[1:8], handlers, state[9], state[10])
+        return compiled
+
+    @classmethod
+    def cached(cls, cache_dir, key, build):
+        """
+        Return the CompiledOptionz saved in cache_dir under the string key,
+        calling build() for an Optionz spec, compiling it and saving the
+        result only if there is none.  A spec is never built on a hit, so
+        this is what saves startup time, and the key must change whenever
+        the spec does: a version number, say, or the modification time of
+        the module that builds the spec.
+        """
+        path = os.path.join(
+            cache_dir,
+            hashlib.sha256(key.encode('utf-8')).hexdigest() + CACHE_EXT)
+        compiled = cls.load(path)
+        if compiled is None:
+            compiled = build().compile()
+            compiled.save(path)
+        return compiled
+
+    @property
+    def subcommands(self):
+        """ Return the names of any subcommands. """
+        return tuple(self._subcommands)
+
+    def subcommand(self, name):
+        """
+        Return the CompiledOptionz for the named subcommand, importing,
+        building and compiling it on first use.
+        """
+        compiled = self._sub_compiled.get(name)
+        if compiled is None:
+            try:
+                source = self._subcommands[name]
+            except KeyError:
+                raise OptionzError("unknown subcommand '%s'" % name)
+            if isinstance(source, str):
+                module_name, _, attr = source.partition(':')
+                try:
+                    source = getattr(importlib.import_module(module_name),
+                                     attr)
+                except (ImportError, AttributeError) as exc:
+                    raise OptionzError(
+                        "can't load subcommand '%s': %s" % (name, exc))
+            spec = source if isinstance(source, Optionz) else source()
+            if not isinstance(spec, Optionz):
+                raise OptionzError(
+                    "subcommand '%s' did not yield an Optionz" % name)
+            compiled = spec.compile()
+            self._sub_compiled[name] = compiled
+        return compiled
+
+    def _apply(self, handler, token, value, tokens, values):
+        """
+        Store the value(s) of one option in values, returning the token
+        which follows them, or None if there is none.  value is any value
+        attached to the tag itself, as in '-b52' or '--name=value';
+        otherwise values are read from the iterator tokens.
+        """
+        slot, kind, convert, _ = handler
+
+        if kind == _FLAG:
+            if value is not None:
+                raise OptionzError("option '%s' takes no value" % token)
+            values[slot] = True
+            return next(tokens, None)
+
+        if kind == _SCALAR:
+            if value is None:
+                value = next(tokens, None)
+                if value is None:
+                    raise OptionzError("option '%s' requires a value" % token)
+            try:
+                values[slot] = convert(value)
+            except ValueError as exc:
+                raise OptionzError("option '%s': %s" % (token, exc))
+            return next(tokens, None)
+
+        return _take_list(handler, token, value, tokens, values)
+
+    def suggest(self, name, limit=3):
+        """
+        Return up to limit long tags close to name, nearest first: those
+        within an edit distance of two, counting a transposition as one
+        edit, and reachable by deleting at most one character from each.
+        Candidates come from an index of single-character deletions,
+        built on first use, so no error costs a scan of every tag.
+        """
+        if self._deletions is None:
+            index = {}
+            for tag in self._long_tags:
+                for key in _deletions(tag):
+                    index.setdefault(key, []).append(tag)
+            self._deletions = index
+        candidates = set()
+        for key in _deletions(name):
+            candidates.update(self._deletions.get(key, ()))
+        ranked = sorted((_edit_distance(name, tag), tag)
+                        for tag in candidates)
+        return [tag for dist, tag in ranked
+                if dist <= SUGGEST_DISTANCE][:limit]
+
+    def _match_prefix(self, prefix, token):
+        """
+        Return the handler for the one long tag beginning with prefix,
+        found by bisecting the sorted long tags, so that '--verb' may
+        stand for '--verbose'.  Raises OptionzError if no tag or more
+        than one begins with prefix.
+        """
+        tags = self._sorted_tags
+        ndx = bisect.bisect_left(tags, prefix)
+        if not prefix or ndx >= len(tags) or \
+                not tags[ndx].startswith(prefix):
+            suggestions = self.suggest(prefix)
+            if suggestions:
+                raise OptionzError(
+                    "unrecognized option '%s'; did you mean %s?" % (
+                        token, ' or '.join('--' + tag for tag in suggestions)))
+            raise OptionzError("unrecognized option '%s'" % token)
+        if ndx + 1 < len(tags) and tags[ndx + 1].startswith(prefix):
+            end = bisect.bisect_left(tags, prefix + '\U0010ffff', ndx)
+            raise OptionzError("ambiguous option '%s' could be %s" % (
+                token, ', '.join('--' + tag for tag in tags[ndx:end])))
+        return self._long_tags[tags[ndx]]
+
+    def _apply_compound(self, token, tokens, values):
+        """
+        Handle a tag token which is not simply '--tag' or '-c', returning
+        the token which follows it and its values: either an abbreviated
+        long tag, '--tag=value', or a cluster of short tags like '-xvf',
+        where the
+        first tag taking a value takes the rest of the token, if any, as
+        its value ('-b52').  Short tags are decoded character by
+        character through a precomputed table; only the value kept is
+        sliced out of the token.
+        """
+        if token[1] == '-':
+            eq_ = token.find('=')
+            if eq_ < 0:
+                name, value = token[2:], None
+            else:
+                name, value = token[2:eq_], token[eq_ + 1:]
+            handler = self._long_tags.get(name)
+            if handler is None:
+                handler = self._match_prefix(name, token)
+            return self._apply(handler, token, value, tokens, values)
+
+        table = self._short_table
+        size = len(token)
+        pos = 1
+        while pos < size:
+            char = token[pos]
+            code = ord(char)
+            handler = table[code] if code < 128 else \
+                self._short_tags.get(char)
+            if handler is None:
+                raise OptionzError("unrecognized option '-%s' in '%s'" % (
+                    char, token))
+            pos += 1
+            if handler[1] == _FLAG:
+                values[handler[0]] = True
+                continue
+            return self._apply(handler, token,
+                               token[pos:] if pos < size else None,
+                               tokens, values)
+        return next(tokens, None)
+
+    # bulk parsing --------------------------------------------------
+
+    def _parse_chunk(self, argvs, arg_files, errors):
+        """
+        Parse a list of argument vectors, returning the results and the
+        OptionzError which ended the chunk, if any.  If errors is
+        'return', a failure is returned in place of its result instead.
+        """
+        results = []
+        for args in argvs:
+            try:
+                results.append(self.parse(args, arg_files))
+            except OptionzError as exc:
+                if errors != 'return':
+                    return results, exc
+                results.append(exc)
+        return results, None
+
+    def parse_many(self, argvs, workers=None, chunksize=256,
+                   arg_files=False, errors='raise'):
+        """
+        Parse many argument vectors, returning an iterator yielding the
+        results in order as they become available.  If errors is 'return',
+        an argument vector which fails to parse yields its OptionzError
+        rather than ending the iteration with it; otherwise every result
+        before the failure is yielded first.
+
+        If workers is more than one, argvs are handed out chunksize at a
+        time to a pool of that many processes.  Each worker builds this
+        spec once, from its tables, and sends results back pickled.  At
+        most two chunks per worker are in flight, so argvs
+        may be an arbitrarily long iterator.
+
+        Workers may be started by spawning fresh interpreters, the only
+        way on some platforms, so the tables must pickle: subcommands
+        must be 'module:attr' paths, module-level callables or Optionz
+        specs, not lambdas or local functions.  Otherwise OptionzError
+        is raised at once, as are bad arguments, before any worker is
+        started.
+        """
+        if errors not in ('raise', 'return'):
+            raise ValueError("errors must be 'raise' or 'return'")
+        if not workers or workers < 2:
+            return self._iter_parse(argvs, arg_files, errors)
+
+        tables = self._tables()
+        try:
+            pickle.dumps(tables)
+        except (pickle.PicklingError, TypeError, AttributeError) as exc:
+            raise OptionzError(
+                "can't hand '%s' to worker processes; subcommands must be "
+                "importable, not lambdas or local functions: %s" % (
+                    self._name, exc))
+        return self._iter_parse_workers(tables, argvs, workers, chunksize,
+                                        arg_files, errors)
+
+    def _iter_parse(self, argvs, arg_files, errors):
+        """ Generate the results of parse_many() in this process. """
+        for args in argvs:
+            try:
+                yield self.parse(args, arg_files)
+            except OptionzError as exc:
+                if errors != 'return':
+                    raise
+                yield exc
+
+    @staticmethod
+    def _iter_parse_workers(tables, argvs, workers, chunksize, arg_files,
+                            errors):
+        """
+        Generate the results of parse_many() from worker processes, each
+        building its spec from tables.
+        """
+        # costly to import (it loads logging), so only when needed
+        import concurrent.futures
+        argvs = iter(argvs)
+        with concurrent.futures.ProcessPoolExecutor(
+                workers, initializer=_init_worker,
+                initargs=(tables,)) as pool:
+            pending = collections.deque()
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = list(itertools.islice(argvs, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_parse_in_worker, chunk,
+                                               arg_files, errors))
+                if not pending:
+                    break
+                results, error = pending.popleft().result()
+                yield from results
+                if error is not None:
+                    for future in pending:
+                        future.cancel()
+                    raise error
+
+    # memoized parse results ----------------------------------------
+
+    def enable_parse_cache(self, maxsize=PARSE_CACHE_SIZE):
+        """
+        Have parse() remember the results of up to maxsize argument
+        vectors, returning the same result object when the same arguments
+        are seen again and discarding the least recently used beyond that.
+        Results are immutable, so one may be shared freely.  Arguments are
+        not memoized when arg_files is set, as the files may change, nor
+        when they fail to parse.  A maxsize of zero disables the cache.
+        """
+        if maxsize < 0:
+            raise ValueError("parse cache size may not be negative")
+        if maxsize == 0:
+            self._parse_cache = None
+        elif self._parse_cache is None:
+            self._parse_cache = collections.OrderedDict()
+        else:
+            cache = self._parse_cache
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+                self._cache_counts[2] += 1
+        self._cache_size = maxsize
+
+    def clear_parse_cache(self):
+        """ Discard any memoized results and zero the statistics. """
+        if self._parse_cache is not None:
+            self._parse_cache.clear()
+        self._cache_counts = [0, 0, 0]
+
+    def parse_cache_info(self):
+        """ Return the parse cache's statistics as a ParseCacheInfo. """
+        hits, misses, evictions = self._cache_counts
+        currsize = len(self._parse_cache) if self._parse_cache else 0
+        return ParseCacheInfo(hits, misses, evictions, self._cache_size,
+                              currsize)
+
+    def parse(self, args, arg_files=False):
+        """
+        Interpret a sequence of command line arguments, not including the
+        program name, returning the option values.  Raises OptionzError on
+        unknown tags, missing values, and values which fail conversion.
+
+        Besides '--tag value' and '-c value', options may be written as
+        '--tag=value' and '-cvalue', and short boolean options may be
+        clustered, so '-xvf name' is the same as '-x -v -f name'.  A long
+        tag may be abbreviated to any prefix which no other long tag shares.
+
+        If arg_files is set, each '@path' argument is first replaced by
+        the arguments in that file; see expand_arg_files().
+        """
+        cache = self._parse_cache
+        if cache is None or arg_files:
+            return self._parser(args, arg_files)
+        key = tuple(args)
+        result = cache.get(key)
+        if result is not None:
+            try:
+                cache.move_to_end(key)
+            except KeyError:        # evicted meanwhile by another thread
+                pass
+            self._cache_counts[0] += 1
+            return result
+        self._cache_counts[1] += 1
+        result = self._parser(key, False)
+        cache[key] = result
+        if len(cache) > self._cache_size:
+            try:
+                cache.popitem(last=False)
+                self._cache_counts[2] += 1
+            except KeyError:
+                pass
+        return result
+
+    def _parse(self, args, arg_files):
+        """
+        Parse args, bypassing the cache; see parse().  Tokens are read
+        one at a time from args, or from the arguments as their files are
+        expanded, so that the values of a list are never copied.
+        """
+        tokens = iter(expand_arg_files(args) if arg_files else args)
+        values = list(self._initial)
+        exact = self._exact
+        token = next(tokens, None)
+        while token is not None:
+            handler = exact.get(token)
+            if handler is not None:
+                token = self._apply(handler, token, None, tokens, values)
+            elif _is_tag(token):
+                token = self._apply_compound(token, tokens, values)
+            elif token in self._subcommands:
+                # everything else belongs to the subcommand
+                values[-2] = token
+                values[-1] = self.subcommand(token).parse(tokens)
+                break
+            else:
+                raise OptionzError("unexpected argument '%s'" % token)
+
+        _freeze_lists(values, self._list_slots)
+        return tuple.__new__(self._result_class, values)
+
+    # what parse() calls: _parse(), or while tracing, the traced routine
+    # which trace() sets on the instance
+    _parser = _parse
+
+    # tracing -------------------------------------------------------
+
+    @contextlib.contextmanager
+    def trace(self, tracer=None):
+        """
+        Context manager charging the cost of each phase of every parse()
+        made within it to tracer, a new ParseTracer by default, which is
+        returned.  Results served from the parse cache are not traced.
+
+        Tracing swaps in a parse routine for this object only, so that
+        untraced parsing costs nothing extra, but while the context lasts
+        parses in all threads are traced.
+        """
+        if '_parser' in self.__dict__:
+            raise OptionzError("'%s' is already being traced" % self._name)
+        if tracer is None:
+            tracer = ParseTracer()
+
+        def traced(args, arg_files):
+            """ Parse args, charging each phase to tracer. """
+            clock = tracer._begin()
+            try:
+                result = self._parse_phases(args, arg_files, clock.mark)
+            except OptionzError as exc:
+                tracer._end(clock, args, exc)
+                raise
+            tracer._end(clock, args, None)
+            return result
+
+        self._parser = traced
+        try:
+            yield tracer
+        finally:
+            del self._parser
+
+    # The methods below are _parse(), _apply_compound() and _apply()
+    # with calls to mark() at each change of phase; they must be kept
+    # in step with the originals.  Lists are stored by _take_list() in
+    # both.
+
+    def _parse_phases(self, args, arg_files, mark):
+        """ _parse(), charging each phase through mark(). """
+        tokens = iter(expand_arg_files(args) if arg_files else args)
+        values = list(self._initial)
+        exact = self._exact
+        token = next(tokens, None)
+        mark(_TOKENIZE)
+        while token is not None:
+            handler = exact.get(token)
+            if handler is not None:
+                mark(_LOOKUP)
+                token = self._apply_phases(handler, token, None, tokens,
+                                           values, mark)
+            elif _is_tag(token):
+                mark(_TOKENIZE)
+                token = self._apply_compound_phases(token, tokens, values,
+                                                    mark)
+            elif token in self._subcommands:
+                compiled = self.subcommand(token)
+                mark(_LOOKUP)
+                values[-2] = token
+                values[-1] = compiled._parse_phases(tokens, False, mark)
+                break
+            else:
+                raise OptionzError("unexpected argument '%s'" % token)
+
+        _freeze_lists(values, self._list_slots)
+        result = tuple.__new__(self._result_class, values)
+        mark(_CONSTRUCT)
+        return result
+
+    def _apply_compound_phases(self, token, tokens, values, mark):
+        """ _apply_compound(), charging each phase through mark(). """
+        if token[1] == '-':
+            eq_ = token.find('=')
+            if eq_ < 0:
+                name, value = token[2:], None
+            else:
+                name, value = token[2:eq_], token[eq_ + 1:]
+            mark(_TOKENIZE)
+            handler = self._long_tags.get(name)
+            if handler is None:
+                handler = self._match_prefix(name, token)
+            mark(_LOOKUP)
+            return self._apply_phases(handler, token, value, tokens, values,
+                                      mark)
+
+        table = self._short_table
+        size = len(token)
+        pos = 1
+        while pos < size:
+            char = token[pos]
+            code = ord(char)
+            handler = table[code] if code < 128 else \
+                self._short_tags.get(char)
+            if handler is None:
+                raise OptionzError("unrecognized option '-%s' in '%s'" % (
+                    char, token))
+            pos += 1
+            mark(_LOOKUP)
+            if handler[1] == _FLAG:
+                values[handler[0]] = True
+                mark(_CONVERT)
+                continue
+            return self._apply_phases(handler, token,
+                                      token[pos:] if pos < size else None,
+                                      tokens, values, mark)
+        token = next(tokens, None)
+        mark(_TOKENIZE)
+        return token
+
+    def _apply_phases(self, handler, token, value, tokens, values, mark):
+        """ _apply(), charging each phase through mark(). """
+        slot, kind, convert, _ = handler
+
+        if kind == _FLAG:
+            if value is not None:
+                raise OptionzError("option '%s' takes no value" % token)
+            values[slot] = True
+            mark(_CONVERT)
+            token = next(tokens, None)
+            mark(_TOKENIZE)
+            return token
+
+        if kind == _SCALAR:
+            if value is None:
+                value = next(tokens, None)
+                if value is None:
+                    raise OptionzError("option '%s' requires a value" % token)
+            mark(_TOKENIZE)
+            try:
+                values[slot] = convert(value)
+            except ValueError as exc:
+                raise OptionzError("option '%s': %s" % (token, exc))
+            # converting a choice is checking it
+            mark(_CONVERT if convert in (str, int, float) else _VALIDATE)
+            token = next(tokens, None)
+            mark(_TOKENIZE)
+            return token
+
+        return _take_list(handler, token, value, tokens, values, mark)
@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+# optionz/optionz/spec.py
+
+""" Optionz specifications and the options they are built from. """
+
+import collections.abc
+import hashlib
+import json
+import weakref
+
+from .core import SUBCOMMAND_FIELDS, OptionzError, ValType, _is_tag
+
+__all__ = ['CACHE_EXT', 'Choices', 'Optionz', 'ZOption',
+           'BoolOption', 'ChoiceOption', 'FloatOption', 'IntOption',
+           'ListOption', 'StrOption', 'intern_option', ]
+
+CACHE_EXT = '.optz'         # compiled specs cached on disk
+
+
+def _list_bounds(size):
+    """
+    Map ListOption's size convention onto (min, max) value counts,
+    where a max of None means that any number may be supplied.
+    """
+    if not size:
+        return (0, None)
+    if size < 0:
+        return (0, -size)
+    return (size, size)
+
+
+class Optionz(object):
+    """
+    Metadata used in interpreting a sequence of command line
+    arguments.
+    """
+
+    def __init__(self, name, desc=None, epilog=None, intern_options=False):
+        self._name = name
+        self._desc = desc           # short, top of help message
+        self._epilog = epilog       # footer for help message
+        self._intern = intern_options   # share options via intern_option()
+        self._z_options = []
+        self._z_map = {}
+        self._short_map = {}        # single-character tag -> option name
+        self._subcommands = {}      # name -> factory or import path
+        self._compiled = None
+
+    def __getstate__(self):
+        """ Pickle without the compiled form, which is rebuilt on demand. """
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
+    @property
+    def name(self):
+        """ Return the name associated with a help message. """
+        return self._name
+
+    @property
+    def desc(self):
+        """ Return the main 'description' part of a help message. """
+        return self._desc
+
+    @property
+    def epilog(self):
+        """ Return the 'epilog' part of a help message. """
+        return self._epilog
+
+    # Possibly want to add 'def add_choice_option()' and 'def add_list_option'
+    # to handle additional parameters
+
+    def add_option(self, name, val_type, default=None, desc=None,
+                   short_tag=None):
+        """
+        Add metadata used in handling a command line argument, including its
+        name, base type (int, str, etc), default value, and the description
+        used in help messages.  If short_tag is supplied, it is the single
+        character used to represent the option in short form ('-x').
+        """
+        if val_type < ValType.BOOL or val_type > ValType.STR:
+            raise OptionzError('unrecognized val_type %d', val_type)
+        if name in self._z_map:
+            raise ValueError("duplicate option name '%s'" % name)
+        self._check_short_tag(short_tag)
+
+        if val_type == ValType.BOOL:
+            new_option = BoolOption(name, default, desc)
+        elif val_type == ValType.FLOAT:
+            new_option = FloatOption(name, default, desc)
+        elif val_type == ValType.INT:
+            new_option = IntOption(name, default, desc)
+        elif val_type == ValType.LIST:
+            new_option = ListOption(name, default, desc)
+        elif val_type == ValType.STR:
+            new_option = StrOption(name, default, desc)
+        else:
+            raise OptionzError("uncaught bad option type %d" % val_type)
+
+        return self._register(new_option, short_tag)
+
+    def add_choice_option(self, name, choices, default=None, desc=None,
+                          short_tag=None):
+        """
+        Add choice metadata to a collection of command line options.
+        """
+        if name in self._z_map:
+            raise ValueError("duplicate option name '%s'" % name)
+        self._check_short_tag(short_tag)
+        new_option = ChoiceOption(name, choices, default, desc)
+        return self._register(new_option, short_tag)
+
+    def add_list_option(self, name, size=0, item_type=ValType.STR,
+                        desc=None, short_tag=None):
+        """
+        Add metadata for an option taking a list of values, each of
+        item_type, which may be ValType.INT, FLOAT or STR.  See ListOption
+        for the meaning of size.
+        """
+        if name in self._z_map:
+            raise ValueError("duplicate option name '%s'" % name)
+        self._check_short_tag(short_tag)
+        new_option = ListOption(name, size, desc, item_type)
+        return self._register(new_option, short_tag)
+
+    def add_subcommand(self, name, source):
+        """
+        Add a subcommand, whose own options follow its name on the
+        command line.  source is either an import path of the form
+        'package.module:attr' or a callable; the attribute or the value
+        returned by the callable is an Optionz or a function returning
+        one.  Nothing is imported or built until the subcommand is
+        actually used, so a program can register hundreds cheaply.
+        Specs with subcommands can only be cached on disk if every
+        source is an import path.
+        """
+        if name in self._subcommands:
+            raise ValueError("duplicate subcommand '%s'" % name)
+        if not name or _is_tag(name):
+            raise OptionzError("invalid subcommand name '%s'" % name)
+        if not isinstance(source, (str, Optionz)) and not callable(source):
+            raise OptionzError(
+                "subcommand '%s' needs an import path or a callable" % name)
+        self._subcommands[name] = source
+        self._compiled = None
+
+    @property
+    def subcommands(self):
+        """ Return the names of any subcommands, in order of addition. """
+        return tuple(self._subcommands)
+
+    def _check_short_tag(self, short_tag):
+        """ Reject malformed or already-used short-form tags. """
+        if short_tag is None:
+            return
+        if len(short_tag) != 1 or short_tag in '- \t':
+            raise OptionzError("invalid short tag '%s'" % short_tag)
+        if short_tag in self._short_map:
+            raise ValueError("duplicate short tag '%s'" % short_tag)
+
+    def _register(self, new_option, short_tag):
+        """
+        Record a new option, returning it or, if options are being
+        interned, its canonical equivalent.  Any compiled form is now
+        stale.
+        """
+        if self._intern:
+            new_option = intern_option(new_option)
+        name = new_option.name
+        self._z_map[name] = new_option
+        self._z_options.append(new_option)
+        if short_tag is not None:
+            self._short_map[short_tag] = name
+        self._compiled = None
+        return new_option
+
+    def short_tag(self, name):
+        """ Return the short-form tag for the named option, or None. """
+        for tag, opt_name in self._short_map.items():
+            if opt_name == name:
+                return tag
+        return None
+
+    # compilation ---------------------------------------------------
+
+    def _build_tables(self):
+        """
+        Reduce the specification to plain tuples and dictionaries, the
+        raw material for a CompiledOptionz.  Unless the spec claims them,
+        a boolean 'help' option with tags '-h' and '--help' is added.
+        If there are subcommands, the fields 'subcommand' and
+        'sub_options' will hold the name of the subcommand used and its
+        parsed options.
+        """
+        fields = []
+        defaults = []
+        specs = []
+        long_tags = {}
+        for ndx, opt in enumerate(self._z_options):
+            fields.append(opt.name)
+            val_type = opt.val_type
+            if val_type == ValType.BOOL:
+                defaults.append(bool(opt.default))
+                extra = None
+            elif val_type == ValType.LIST:
+                defaults.append(())
+                extra = _list_bounds(opt.size) + (int(opt.item_type),)
+            elif val_type == ValType.CHOICE:
+                defaults.append(opt.default)
+                extra = tuple(opt.choices)
+            else:
+                defaults.append(opt.default)
+                extra = None
+            specs.append((int(val_type), extra))
+            long_tags[opt.name] = ndx
+        short_tags = {tag: long_tags[name]
+                      for tag, name in self._short_map.items()}
+
+        if 'help' not in long_tags:
+            ndx = len(fields)
+            fields.append('help')
+            defaults.append(False)
+            specs.append((int(ValType.BOOL), None))
+            long_tags['help'] = ndx
+            if 'h' not in short_tags:
+                short_tags['h'] = ndx
+
+        if self._subcommands:
+            for name in SUBCOMMAND_FIELDS:
+                if name in long_tags:
+                    raise OptionzError(
+                        "option name '%s' is reserved for subcommands" % name)
+            fields.extend(SUBCOMMAND_FIELDS)
+            defaults.extend((None, None))
+
+        return (self._name, tuple(fields), tuple(defaults), tuple(specs),
+                long_tags, short_tags, dict(self._subcommands))
+
+    def fingerprint(self):
+        """
+        Return a hex digest of the specification's content: the names,
+        types, defaults, choices, descriptions and short tags of its
+        options.  Identical specifications have identical fingerprints.
+        """
+        tags = {name: tag for tag, name in self._short_map.items()}
+        content = [self._name]
+        for opt in self._z_options:
+            if opt.val_type == ValType.CHOICE:
+                extra = list(opt.choices)
+            elif opt.val_type == ValType.LIST:
+                extra = int(opt.item_type)
+            else:
+                extra = None
+            content.append((opt.name, int(opt.val_type), opt.default,
+                            extra, opt.desc, tags.get(opt.name)))
+        for name, source in self._subcommands.items():
+            if isinstance(source, Optionz):
+                source = source.fingerprint()
+            elif not isinstance(source, str):
+                source = '%s:%s' % (getattr(source, '__module__', None),
+                                    getattr(source, '__qualname__', None))
+            content.append((name, source))
+        return hashlib.sha256(repr(content).encode('utf-8')).hexdigest()
+
+    def compile(self):
+        """
+        Freeze the specification into a CompiledOptionz, whose dispatch
+        tables let parse() handle each token in constant time.  The result
+        is cached until the next option is added.  To keep compiled specs
+        on disk between processes, see CompiledOptionz.cached().
+        """
+        if self._compiled is None:
+            # the parser engine is only loaded once something is compiled
+            from .parser import CompiledOptionz
+            self._compiled = CompiledOptionz(*self._build_tables())
+        return self._compiled
+
+    def parse(self, args, arg_files=False):
+        """ Compile if necessary and parse args (excluding argv[0]). """
+        return self.compile().parse(args, arg_files)
+
+    def parse_many(self, argvs, workers=None, chunksize=256,
+                   arg_files=False, errors='raise'):
+        """
+        Compile if necessary and parse many argument vectors; see
+        CompiledOptionz.parse_many().
+        """
+        return self.compile().parse_many(argvs, workers, chunksize,
+                                         arg_files, errors)
+
+    def trace(self, tracer=None):
+        """
+        Compile if necessary and trace the phases of parsing; see
+        CompiledOptionz.trace().
+        """
+        return self.compile().trace(tracer)
+
+    # serialization -------------------------------------------------
+
+    def to_dict(self):
+        """
+        Return a JSON-friendly dictionary describing the specification,
+        with options in declaration order.
+        """
+        tags = {name: tag for tag, name in self._short_map.items()}
+        options = []
+        for opt in self._z_options:
+            data = opt.to_dict()
+            if opt.name in tags:
+                data['short_tag'] = tags[opt.name]
+            options.append(data)
+        data = {'name': self._name, 'desc': self._desc,
+                'epilog': self._epilog, 'options': options}
+        if self._subcommands:
+            for name, source in self._subcommands.items():
+                if not isinstance(source, str):
+                    raise OptionzError(
+                        "subcommand '%s' has no import path" % name)
+            data['subcommands'] = dict(self._subcommands)
+        return data
+
+    def to_json(self, **kwargs):
+        """ Serialize the specification as JSON; kwargs go to json.dumps. """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_dict(cls, data, intern_options=False):
+        """
+        Build an Optionz from a dictionary like those produced by to_dict().
+        The options are installed in one pass, with duplicate names and
+        short tags detected once over the whole set rather than option
+        by option.
+        """
+        optz = cls(data['name'], data.get('desc'), data.get('epilog'),
+                   intern_options)
+        items = data.get('options', ())
+        options = [ZOption.from_dict(item) for item in items]
+        if intern_options:
+            options = [intern_option(opt) for opt in options]
+
+        z_map = {opt.name: opt for opt in options}
+        if len(z_map) != len(options):
+            seen = set()
+            for opt in options:
+                if opt.name in seen:
+                    raise ValueError("duplicate option name '%s'" % opt.name)
+                seen.add(opt.name)
+
+        short_map = {}
+        for item in items:
+            short_tag = item.get('short_tag')
+            if short_tag is not None:
+                optz._check_short_tag(short_tag)
+                if short_tag in short_map:
+                    raise ValueError("duplicate short tag '%s'" % short_tag)
+                short_map[short_tag] = item['name']
+
+        optz._z_options = options
+        optz._z_map = z_map
+        optz._short_map = short_map
+        for name, source in data.get('subcommands', {}).items():
+            optz.add_subcommand(name, source)
+        return optz
+
+    @classmethod
+    def from_json(cls, text, intern_options=False):
+        """ Build an Optionz from JSON produced by to_json(). """
+        return cls.from_dict(json.loads(text), intern_options)
+
+    def __len__(self):
+        """
+        Return the number of distinct option types.  A single set of
+        choices, for example, or a list of variable length will each
+        increase this value by one.  In other words, it is not generally
+        the same as the number of arguments in any particular command line.
+
+        """
+        return len(self._z_options)
+
+
+class ZOption(object):
+    """ Basic attributes of an Option: name, type, default, desc."""
+
+    # no per-instance __dict__; __weakref__ lets the intern pool hold
+    # options weakly
+    __slots__ = ('_name', '_type', '_default', '_desc', '__weakref__')
+
+    def __init__(self, name, val_type, default, desc):
+        self._name = name
+        self._type = val_type
+        self._default = default
+        self._desc = desc       # brief, used in usage()
+
+    @property
+    def name(self):
+        """ Return the name of an Option. """
+        return self._name
+
+    @property
+    def val_type(self):
+        """ Return the ValType of an Option. """
+        return self._type
+
+    @property
+    def default(self):
+        """ Return the default value of an Option. """
+        return self._default
+
+    @property
+    def desc(self):
+        """ Return the description associated with an Option. """
+        return self._desc
+
+    def _key(self):
+        """
+        Return a hashable tuple of everything which distinguishes this
+        Option; instances are equal if their keys are equal.
+        """
+        return (type(self), self._name, _hashable(self._default),
+                self._desc)
+
+    def __eq__(self, other):
+        return isinstance(other, ZOption) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def to_dict(self):
+        """ Return a JSON-friendly dictionary describing the Option. """
+        return {'name': self._name, 'type': self._type.name,
+                'default': self._default, 'desc': self._desc}
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Return an Option of the appropriate subclass built from a
+        dictionary like those produced by to_dict().
+        """
+        try:
+            val_type = ValType[data['type']]
+        except KeyError:
+            raise OptionzError("unrecognized option type '%s'" % data.get(
+                'type'))
+        name = data['name']
+        desc = data.get('desc')
+        if val_type == ValType.CHOICE:
+            return ChoiceOption(name, data['choices'], data.get('default'),
+                                desc)
+        if val_type == ValType.LIST:
+            return ListOption(name, data.get('size'), desc,
+                              ValType[data.get('item_type', 'STR')])
+        if val_type == ValType.BOOL:
+            return BoolOption(name, data.get('default', False), desc)
+        return _OPTION_CLASSES[val_type](name, data.get('default'), desc)
+
+
+def _hashable(value):
+    """
+    Return a hashable form of value which also records its type, so
+    that equal values of different types, like True, 1 and 1.0, are kept
+    apart.  Lists and tuples become tuples of such forms.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value),) + tuple(_hashable(elm) for elm in value)
+    return (type(value), value)
+
+
+# canonical instances of options, see intern_option()
+_OPTION_POOL = weakref.WeakValueDictionary()
+
+
+def intern_option(option):
+    """
+    Return the canonical instance of an option equal to this one,
+    making this one canonical if there is none.  Options are immutable,
+    so specifications sharing many identical options ('verbose',
+    'dry_run', ...) can share single instances.  The pool holds options
+    only as long as something else does.
+    """
+    key = option._key()
+    try:
+        return _OPTION_POOL.setdefault(key, option)
+    except TypeError:
+        # some default value can't be hashed
+        return option
+
+
+class BoolOption(ZOption):
+    """ Command line option of boolean type. """
+
+    __slots__ = ()
+
+    def __init__(self, name, default=False, desc=None):
+        super().__init__(name, ValType.BOOL, default, desc)
+
+
+class Choices(collections.abc.Sequence):
+    """
+    A frozen, ordered collection of choices with a hashed index, so that
+    membership tests and index() take constant time.  It compares equal
+    to any list or tuple holding the same choices in the same order.
+    Unhashable choices are allowed, but are then searched linearly.
+    """
+
+    __slots__ = ('_items', '_positions')
+
+    def __init__(self, choices):
+        self._items = tuple(choices)
+        positions = {}
+        try:
+            for ndx, choice in enumerate(self._items):
+                positions.setdefault(choice, ndx)
+        except TypeError:
+            positions = None
+        self._positions = positions
+
+    def __getitem__(self, ndx):
+        return self._items[ndx]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, value):
+        if self._positions is not None:
+            try:
+                return value in self._positions
+            except TypeError:
+                return False
+        return value in self._items
+
+    def index(self, value, start=0, stop=None):
+        """ Return the position of the first occurrence of value. """
+        if self._positions is not None and start == 0 and stop is None:
+            try:
+                return self._positions[value]
+            except (KeyError, TypeError):
+                raise ValueError("%r is not one of the choices" % (value,))
+        return self._items.index(value, start,
+                                 len(self._items) if stop is None else stop)
+
+    def __eq__(self, other):
+        if isinstance(other, Choices):
+            return self._items == other._items
+        if isinstance(other, (list, tuple)):
+            return self._items == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._items)
+
+    def __repr__(self):
+        return 'Choices(%r)' % (list(self._items),)
+
+
+class ChoiceOption(ZOption):
+    """
+    This implementation makes no attempt to make sure that the list
+    of choices is homogeneous (all elements are of the same type) or
+    otherwise sensible.
+    """
+
+    __slots__ = ('_choices',)
+
+    def __init__(self, name, choices, default=None, desc=None):
+        super().__init__(name, ValType.CHOICE, default, desc)
+        self._choices = choices if isinstance(choices, Choices) else \
+            Choices(choices)
+
+        if default and default not in self._choices:
+            raise OptionzError("default value '%s' is not in %s's choices" % (
+                default, name))
+
+    @property
+    def choices(self):
+        """
+        Return the choices, as a read-only Choices view; nothing is
+        copied.
+        """
+        return self._choices
+
+    def _key(self):
+        return super()._key() + (_hashable(tuple(self._choices)),)
+
+    def to_dict(self):
+        """ Return a JSON-friendly dictionary, including the choices. """
+        data = super().to_dict()
+        data['choices'] = list(self._choices)
+        return data
+
+
+class FloatOption(ZOption):
+    """ Command line option of float type. """
+
+    __slots__ = ()
+
+    def __init__(self, name, default=None, desc=None):
+        super().__init__(name, ValType.FLOAT, default, desc)
+
+
+class IntOption(ZOption):
+    """ Command line option of int type. """
+
+    __slots__ = ()
+
+    def __init__(self, name, default=None, desc=None):
+        super().__init__(name, ValType.INT, default, desc)
+
+
+class ListOption(ZOption):
+    """
+    Here 'default' is interpreted as the number of elements in the
+    list: 0 means any number, -N means up to N values inclusive
+    may be supplied, and N > 0 means that exactly N values must
+    be supplied.
+    """
+
+    __slots__ = ('_item_type',)
+
+    def __init__(self, name, default=None, desc=None,
+                 item_type=ValType.STR):
+        super().__init__(name, ValType.LIST, default, desc)
+        if item_type not in (ValType.FLOAT, ValType.INT, ValType.STR):
+            raise OptionzError("list items may not be of type %s" % (
+                ValType(item_type).name))
+        self._item_type = ValType(item_type)
+
+    # an alias
+    @property
+    def size(self):
+        """ Return the default number of items in the list. """
+        return self._default
+
+    @property
+    def item_type(self):
+        """
+        Return the ValType of items in the list.  Parsed INT and FLOAT
+        lists are read-only memoryviews over an array.array.
+        """
+        return self._item_type
+
+    def _key(self):
+        return super()._key() + (self._item_type,)
+
+    def to_dict(self):
+        """ Return a JSON-friendly dictionary; default appears as size. """
+        data = super().to_dict()
+        data['size'] = data.pop('default')
+        data['item_type'] = self._item_type.name
+        return data
+
+
+class StrOption(ZOption):
+    """ Command line option of string type. """
+
+    __slots__ = ()
+
+    def __init__(self, name, default=None, desc=None):
+        super().__init__(name, ValType.STR, default, desc)
+
+
+# ZOption subclass for each ValType
+_OPTION_CLASSES = {
+    ValType.BOOL: BoolOption,
+    ValType.CHOICE: ChoiceOption,
+    ValType.FLOAT: FloatOption,
+    ValType.INT: IntOption,
+    ValType.LIST: ListOption,
+    ValType.STR: StrOption,
+}
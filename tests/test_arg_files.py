@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# testArgFiles.py
+
+""" Test expansion of @file argument files. """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import optionz.parser
+from optionz import Optionz as Z
+from optionz import OptionzError, ValType, expand_arg_files
+
+
+class TestArgFiles(unittest.TestCase):
+    """ Test expansion of @file argument files. """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.saved_threshold = optionz.parser.MMAP_THRESHOLD
+        self.saved_block = optionz.parser._LINES_BLOCK
+
+    def tearDown(self):
+        optionz.parser.MMAP_THRESHOLD = self.saved_threshold
+        optionz.parser._LINES_BLOCK = self.saved_block
+        shutil.rmtree(self.dir)
+
+    # utility functions #############################################
+
+    def write(self, name, text):
+        """ Write an argument file, returning its @path. """
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', newline='') as file:
+            file.write(text)
+        return '@' + path
+
+    # actual unit tests #############################################
+
+    def test_expansion(self):
+        """ Files expand in place, one argument per line. """
+
+        inner = self.write('inner', 'c\r\n\nd e\n')
+        outer = self.write('outer', 'b\n%s\nf' % inner)
+        empty = self.write('empty', '')
+        self.assertEqual(list(expand_arg_files(['a', outer, empty, '@'])),
+                         ['a', 'b', 'c', 'd e', 'f', '@'])
+
+        # lazily: nothing is opened until it is reached
+        tokens = expand_arg_files(['a', '@' + os.path.join(self.dir, 'no')])
+        self.assertEqual(next(tokens), 'a')
+        with self.assertRaises(OptionzError):
+            next(tokens)
+
+    def test_limits(self):
+        """ Nesting depth and total size are bounded. """
+
+        loop = os.path.join(self.dir, 'loop')
+        self.write('loop', 'x\n@%s\n' % loop)
+        with self.assertRaises(OptionzError):
+            list(expand_arg_files(['@' + loop]))
+        tokens = expand_arg_files(['@' + loop], max_depth=3)
+        self.assertEqual([next(tokens) for _ in range(3)], ['x', 'x', 'x'])
+        with self.assertRaises(OptionzError):
+            next(tokens)
+
+        big = self.write('big', 'y\n' * 100)
+        self.assertEqual(len(list(expand_arg_files([big], max_size=200))),
+                         100)
+        with self.assertRaises(OptionzError):
+            list(expand_arg_files([big, big], max_size=300))
+
+    def test_blocks(self):
+        """ Files split a block at a time expand as if split whole. """
+
+        inner = self.write('inner', 'p\nq')
+        lines = ['line%d \u00e9\u20ac' % ndx for ndx in range(40)]
+        lines[7] = 'long ' * 10         # longer than a block
+        lines[23] = inner
+        text = '\r\n'.join(lines[:20]) + '\n\n' + '\n'.join(lines[20:])
+        outer = self.write('outer', text)
+        expected = lines[:23] + ['p', 'q'] + lines[24:]
+        for threshold in (1 << 20, 64):             # read, then mapped
+            optionz.parser.MMAP_THRESHOLD = threshold
+            for block in (16, 1 << 18):
+                optionz.parser._LINES_BLOCK = block
+                self.assertEqual(list(expand_arg_files([outer])), expected)
+
+    def test_parse_with_mmap(self):
+        """ Memory-mapped files feed list options. """
+
+        optionz.parser.MMAP_THRESHOLD = 64
+        paths = ['/data/shard%05d/part-0' % ndx for ndx in range(5000)]
+        files = self.write('files', '\n'.join(paths) + '\n')
+        ids = self.write('ids', '\n'.join(str(n) for n in range(5000)))
+
+        my_optz = Z('fred')
+        my_optz.add_list_option('files', 0, short_tag='f')
+        my_optz.add_list_option('ids', 0, ValType.INT)
+        my_optz.add_option('count', ValType.INT, 3)
+        result = my_optz.parse(['-f', files, '--ids', ids, '--count', '4'],
+                               arg_files=True)
+        self.assertEqual(result.files, tuple(paths))
+        self.assertEqual(result.ids.tolist(), list(range(5000)))
+        self.assertEqual(result.count, 4)
+
+        # a subcommand takes the rest of the expanded arguments
+        sub = Z('sub')
+        sub.add_list_option('ids', 0, ValType.INT)
+        my_optz.add_subcommand('sub', sub)
+        rest = self.write('rest', 'sub\n--ids\n%s\n' % ids)
+        for _ in range(2):
+            result = my_optz.parse(['--count', '5', rest], arg_files=True)
+            self.assertEqual(result.sub_options.ids.tolist(),
+                             list(range(5000)))
+            my_optz.compile().subcommand('sub').enable_parse_cache()
+
+        # expansion is off by default
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--count', '4', files])
+        result = my_optz.parse(['-f', files])
+        self.assertEqual(result.files, (files,))
+
+
+if __name__ == '__main__':
+    unittest.main()
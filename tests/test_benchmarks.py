@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# testBenchmarks.py
+
+""" Smoke test the benchmark suite and its JSON report. """
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BENCH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks', 'bench_optionz.py')
+
+
+class TestBenchmarks(unittest.TestCase):
+    """ Smoke test the benchmark suite and its JSON report. """
+
+    def test_report(self):
+        """ A minimal run writes a report comparable with another. """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'bench.json')
+            for extra in ([], ['--compare', path]):
+                subprocess.run(
+                    [sys.executable, BENCH, '--quick', '-r', '1', '-t', '0',
+                     '-o', path] + extra,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    check=True)
+            with open(path, 'r') as file:
+                report = json.load(file)
+
+        results = report['results']
+        self.assertEqual(len(results), 6 * 2)
+        self.assertEqual({entry['case'] for entry in results},
+                         {'construct', 'cached', 'parse', 'choices',
+                          'dump_wide', 'dump_lists'})
+        for entry in results:
+            self.assertGreater(entry['optionz'], 0)
+            if entry['case'].startswith('dump_'):
+                # argparse has no equivalent formatter
+                self.assertIsNone(entry['argparse'])
+                self.assertIsNone(entry['ratio'])
+                continue
+            self.assertGreater(entry['argparse'], 0)
+            self.assertAlmostEqual(entry['ratio'],
+                                   entry['optionz'] / entry['argparse'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# testChoices.py
+
+""" Test the hashed Choices index behind ChoiceOption. """
+
+import unittest
+
+from optionz import Optionz as Z
+from optionz import ChoiceOption, Choices, OptionzError
+
+
+class TestChoices(unittest.TestCase):
+    """ Test the hashed Choices index behind ChoiceOption. """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_choices(self):
+        """ Choices is an ordered, frozen, hashed sequence. """
+
+        regions = ['region%04d' % ndx for ndx in range(5000)]
+        choices = Choices(regions)
+        self.assertEqual(len(choices), 5000)
+        self.assertEqual(choices, regions)
+        self.assertEqual(regions, choices)
+        self.assertEqual(choices, tuple(regions))
+        self.assertEqual(list(choices), regions)
+        self.assertEqual(choices[17], 'region0017')
+        self.assertEqual(choices[-1], 'region4999')
+        self.assertEqual(choices.index('region4321'), 4321)
+        self.assertTrue('region4999' in choices)
+        self.assertFalse('region5000' in choices)
+        self.assertFalse(['unhashable'] in choices)
+        with self.assertRaises(ValueError):
+            choices.index('nowhere')
+        with self.assertRaises(TypeError):
+            # pylint: disable=unsupported-assignment-operation
+            choices[0] = 'x'
+        self.assertNotEqual(choices, regions[::-1])
+        self.assertEqual(hash(choices), hash(Choices(regions)))
+
+        # duplicates keep their first position
+        self.assertEqual(Choices(['a', 'b', 'a']).index('a'), 0)
+
+        # unhashable choices work, slowly
+        odd = Choices([[1], [2]])
+        self.assertTrue([2] in odd)
+        self.assertEqual(odd.index([2]), 1)
+
+    def test_choice_option(self):
+        """ ChoiceOption.choices is a view, not a copy. """
+
+        opt = ChoiceOption('color', ['red', 'green', 'blue'], 'green')
+        self.assertTrue(opt.choices is opt.choices)
+        self.assertTrue(isinstance(opt.choices, Choices))
+        self.assertEqual(opt.choices, ['red', 'green', 'blue'])
+        with self.assertRaises(OptionzError):
+            ChoiceOption('color', ['red', 'green'], 'blue')
+
+    def test_validator(self):
+        """ Parsed values are checked against a precompiled index. """
+
+        my_optz = Z('fred')
+        my_optz.add_choice_option('region', ['us-east', 'eu-west'],
+                                  short_tag='r')
+        my_optz.add_choice_option('level', [1, 2, 3], 2)
+        result = my_optz.parse(['-r', 'eu-west', '--level', '3'])
+        self.assertEqual(result.region, 'eu-west')
+        self.assertEqual(result.level, 3)       # the choice, not the text
+        for args in (['-r', 'ap-south'], ['--level', '4']):
+            with self.assertRaises(OptionzError):
+                my_optz.parse(args)
+
+
+if __name__ == '__main__':
+    unittest.main()
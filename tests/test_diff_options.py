@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# testDiffOptions.py
+
+""" Test diff_options() and dump_diff(). """
+
+import unittest
+
+from argparse import Namespace
+from optionz import Optionz as Z
+from optionz import (DIFF_EXACT_LIMIT, OptionDiff, ValType,
+                     diff_options, dump_diff)
+
+
+class TestDiffOptions(unittest.TestCase):
+    """ Test diff_options() and dump_diff(). """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_scalars(self):
+        """ Added, removed and changed scalar values. """
+
+        ns_a = Namespace(ab=45.2, fghi='foxtrot', xyz=97, z=False)
+        ns_b = Namespace(ab=45.2, xyz=98, z=False, zz='zulu')
+        self.assertEqual(diff_options(ns_a, ns_a), [])
+        self.assertEqual(diff_options(ns_a, ns_b), [
+            OptionDiff('fghi', 'removed', 'foxtrot', None, None),
+            OptionDiff('xyz', 'changed', 97, 98, None),
+            OptionDiff('zz', 'added', None, 'zulu', None)])
+        self.assertEqual(diff_options(None, Namespace(a=1)),
+                         [OptionDiff('a', 'added', None, 1, None)])
+
+        expected = """  OPTION OLD     NEW
+- fghi   foxtrot
+~ xyz    97      98
++ zz             zulu
+"""
+        self.assertEqual(dump_diff(diff_options(ns_a, ns_b)), expected)
+        self.assertEqual(dump_diff([]), '  OPTION OLD NEW\n')
+        self.assertEqual(dump_diff([], with_headers=False), '')
+
+    def test_lists(self):
+        """ List values are diffed element by element. """
+
+        ns_a = Namespace(files=['a', 'b', 'c', 'd'], n=1)
+        ns_b = Namespace(files=['a', 'x', 'c', 'd', 'e'], n=1)
+        diffs = diff_options(ns_a, ns_b)
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0].change, 'changed')
+        self.assertEqual(diffs[0].edits, [('-', 1, ('b',)),
+                                          ('+', 1, ('x',)),
+                                          ('+', 4, ('e',))])
+        expected = """  OPTION OLD NEW
+
+~ FILESS:
+    - 1 b
+    + 1 x
+    + 4 e
+"""
+        self.assertEqual(dump_diff(diffs), expected)
+
+        # equal lists don't differ, and tuples compare with lists
+        self.assertEqual(diff_options(ns_a, Namespace(
+            files=('a', 'b', 'c', 'd'), n=1)), [])
+
+    def test_huge_lists(self):
+        """ Lists too long to align are compared as multisets. """
+
+        size = 4 * int(DIFF_EXACT_LIMIT ** 0.5)
+        old = ['/f%07d' % ndx for ndx in range(size)]
+        new = list(reversed(old[1:])) + ['/extra']
+        diffs = diff_options(Namespace(paths=old), Namespace(paths=new))
+        self.assertEqual(diffs[0].edits, [('-', None, ('/f0000000',)),
+                                          ('+', None, ('/extra',))])
+        self.assertTrue('    - ? /f0000000\n' in dump_diff(diffs))
+
+        # a small difference in a huge list is still located exactly
+        new = old[:]
+        new[size // 2] = '/changed'
+        diffs = diff_options(Namespace(paths=old), Namespace(paths=new))
+        self.assertEqual(diffs[0].edits, [
+            ('-', size // 2, (old[size // 2],)),
+            ('+', size // 2, ('/changed',))])
+
+    def test_parse_results(self):
+        """ Parse results can be diffed too. """
+
+        my_optz = Z('fred')
+        my_optz.add_option('count', ValType.INT, 3)
+        my_optz.add_option('files', ValType.LIST, 0)
+        res_a = my_optz.parse(['--files', 'a', 'b'])
+        res_b = my_optz.parse(['--count', '4', '--files', 'a'])
+        self.assertEqual(diff_options(res_a, res_b), [
+            OptionDiff('count', 'changed', 3, 4, None),
+            OptionDiff('files', 'changed', ('a', 'b'), ('a',),
+                       [('-', 1, ('b',))])])
+
+        # the options of a subcommand are compared by name
+        sub = Z('build')
+        sub.add_option('jobs', ValType.INT, 1)
+        sub.add_option('target', ValType.STR, 'x')
+        my_optz.add_subcommand('build', sub)
+        res_a = my_optz.parse(['build', '--jobs', '4'])
+        res_b = my_optz.parse(['build', '--jobs', '8'])
+        self.assertEqual(diff_options(res_a, res_b), [
+            OptionDiff('sub_options.jobs', 'changed', 4, 8, None)])
+        self.assertEqual(diff_options(my_optz.parse([]), res_a)[0],
+                         OptionDiff('sub_options', 'removed', None, None,
+                                    None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,15 @@
 
 """  Test the dump_options_ method. """
 
+import io
+import json
 import unittest
 
 from argparse import Namespace
-from optionz import dump_options
+from optionz import Optionz as Z
+from optionz import (DUMP_CHUNK, ValType, dump_options, dump_options_many,
+                     dump_options_to, iter_dump_options,
+                     iter_dump_options_many)
 
 JUST_HEADERS = 'OPTION VALUE\n'
 
@@ -123,6 +128,202 @@ BAZS:
         self.assertEqual(dump_options(ns_, with_headers=True),
                          JUST_HEADERS + expected6)
 
+    def test_streaming(self):
+        """ Streamed output is identical to that of dump_options(). """
+
+        self.assertEqual(list(iter_dump_options(None, with_headers=False)),
+                         [])
+        self.assertEqual(list(iter_dump_options(Namespace())),
+                         [JUST_HEADERS])
+
+        paths = ['/tmp/f%06d' % ndx for ndx in range(2 * DUMP_CHUNK + 5)]
+        kwargs = {'z': False, 'xyz': 995, 'ab': 45.2, 'fghi': 'foxtrot',
+                  'baz': ['a', 995, True, (1, 2)], 'paths': paths}
+        ns_ = Namespace(**kwargs)
+        for with_headers in (False, True):
+            expected = dump_options(ns_, with_headers)
+            chunks = list(iter_dump_options(ns_, with_headers))
+            self.assertEqual(''.join(chunks), expected)
+            # the long list is broken into chunks
+            self.assertTrue(len(chunks) >= 6)
+
+            out = io.StringIO()
+            dump_options_to(out, ns_, with_headers)
+            self.assertEqual(out.getvalue(), expected)
+
+        self.assertTrue('\nPATHSS:\n    /tmp/f000000\n' in expected)
+        self.assertTrue('\n    (1, 2)\n' in expected)
+        self.assertTrue(expected.endswith('    /tmp/f%06d\n' % (
+            2 * DUMP_CHUNK + 4)))
+
+    def test_list_columns(self):
+        """ List values may be packed into aligned columns. """
+
+        ns_ = Namespace(z=False, baz=['a', 995, True, 'long_value', 7])
+        expected = """z False
+
+BAZS:
+    a           995
+    True        long_value
+    7
+"""
+        self.assertEqual(dump_options(ns_, False, columns=2), expected)
+
+        # 4 + 3 * 10 + 2 * 2 = 38 characters, just enough for 3 columns
+        expected = """z False
+
+BAZS:
+    a           995         True
+    long_value  7
+"""
+        self.assertEqual(dump_options(ns_, False, 'auto', 38), expected)
+        self.assertEqual(dump_options(ns_, False, 'auto', 37),
+                         dump_options(ns_, False, columns=2))
+        # never fewer than one column
+        self.assertEqual(dump_options(ns_, False, 'auto', 5),
+                         dump_options(ns_, False, columns=1))
+        self.assertEqual(dump_options(ns_, False, columns=1),
+                         dump_options(ns_, False))
+
+        # long lists are still streamed in chunks of whole rows
+        ns_ = Namespace(nums=list(range(3 * DUMP_CHUNK)))
+        chunks = list(iter_dump_options(ns_, False, columns=7))
+        self.assertTrue(len(chunks) > 3)
+        lines = ''.join(chunks).split('\n')
+        self.assertEqual(lines[2].split(), [str(n) for n in range(7)])
+        self.assertEqual(lines[-2].split(),
+                         [str(n) for n in range(21 * (DUMP_CHUNK // 7),
+                                                3 * DUMP_CHUNK)])
+
+        for columns in (0, -1, 'wide', 2.5):
+            with self.assertRaises(ValueError):
+                dump_options(ns_, columns=columns)
+
+    def test_parse_results(self):
+        """ Parse results dump like the equivalent Namespace. """
+
+        my_optz = Z('fred')
+        my_optz.add_option('xyz', ValType.INT, 995)
+        my_optz.add_option('ab', ValType.FLOAT, 45.2)
+        my_optz.add_option('baz', ValType.LIST, 0)
+        result = my_optz.parse(['--baz', 'a', 'b'])
+        ns_ = Namespace(xyz=995, ab=45.2, baz=['a', 'b'], help=False)
+        for fmt in ('table', 'jsonl', 'csv', 'tsv'):
+            self.assertEqual(dump_options(result, format=fmt),
+                             dump_options(ns_, format=fmt))
+
+        # numeric lists are memoryviews
+        my_optz.add_list_option('ids', 0, ValType.INT)
+        result = my_optz.parse(['--ids', '3', '1'])
+        ns_ = Namespace(xyz=995, ab=45.2, baz=[], ids=[3, 1], help=False)
+        for fmt in ('table', 'jsonl', 'csv', 'tsv'):
+            self.assertEqual(dump_options(result, format=fmt),
+                             dump_options(ns_, format=fmt))
+
+    def test_nested_results(self):
+        """ A subcommand's options are dumped under dotted names. """
+
+        sub = Z('build')
+        sub.add_option('jobs', ValType.INT, 1)
+        sub.add_option('target', ValType.STR, 'all')
+        sub.add_list_option('ids', 0, ValType.INT)
+        my_optz = Z('make')
+        my_optz.add_option('verbose', ValType.BOOL)
+        my_optz.add_subcommand('build', sub)
+        result = my_optz.parse(['build', '--jobs', '4', '--ids', '7', '8'])
+        ns_ = Namespace(**{'verbose': False, 'help': False,
+                           'subcommand': 'build',
+                           'sub_options.jobs': 4, 'sub_options.help': False,
+                           'sub_options.target': 'all',
+                           'sub_options.ids': [7, 8]})
+        for fmt in ('table', 'jsonl', 'csv', 'tsv'):
+            self.assertEqual(dump_options(result, format=fmt),
+                             dump_options(ns_, format=fmt))
+        self.assertIn('sub_options.jobs   4\n', dump_options(result))
+        self.assertIn('{"option": "sub_options.jobs", "value": 4}\n',
+                      dump_options(result, format='jsonl'))
+        self.assertIn('sub_options.ids    7,8\n',
+                      dump_options_many([result]))
+
+    def test_machine_readable(self):
+        """ JSON Lines, CSV and TSV output. """
+
+        ns_ = Namespace(z=False, xyz=995, ab=45.2, fghi='fox,"trot"',
+                        baz=['a', 995, 'tab\there'])
+
+        lines = dump_options(ns_, format='jsonl').splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [{'option': 'ab', 'value': 45.2},
+                          {'option': 'fghi', 'value': 'fox,"trot"'},
+                          {'option': 'xyz', 'value': 995},
+                          {'option': 'z', 'value': False},
+                          {'option': 'baz',
+                           'value': ['a', 995, 'tab\there']}])
+        # headers don't apply to JSON Lines
+        self.assertEqual(dump_options(ns_, False, format='jsonl'),
+                         '\n'.join(lines) + '\n')
+
+        expected = ('OPTION,VALUE\n'
+                    'ab,45.2\n'
+                    'fghi,"fox,""trot"""\n'
+                    'xyz,995\n'
+                    'z,False\n'
+                    'baz,a\n'
+                    'baz,995\n'
+                    'baz,tab\there\n')
+        self.assertEqual(dump_options(ns_, format='csv'), expected)
+        self.assertEqual(dump_options(ns_, False, format='csv'),
+                         expected[len('OPTION,VALUE\n'):])
+
+        expected = ('OPTION\tVALUE\n'
+                    'ab\t45.2\n'
+                    'fghi\t"fox,""trot"""\n'
+                    'xyz\t995\n'
+                    'z\tFalse\n'
+                    'baz\ta\n'
+                    'baz\t995\n'
+                    'baz\t"tab\there"\n')
+        self.assertEqual(dump_options(ns_, format='tsv'), expected)
+
+        self.assertEqual(dump_options(None, format='jsonl'), '')
+        self.assertEqual(dump_options(Namespace(), format='tsv'),
+                         'OPTION\tVALUE\n')
+        with self.assertRaises(ValueError):
+            dump_options(ns_, format='xml')
+
+    def test_many(self):
+        """ Compare several runs in one table. """
+
+        runs = [Namespace(z=False, xyz=97, ab=45.2),
+                Namespace(z=True, xyz=1234567, fghi='foxtrot'),
+                Namespace(z=False, ab=1.5, baz=['a', 995])]
+        expected = """OPTION 0         1       2
+ab     45.200000 -       1.500000
+baz    -         -       a,995
+fghi   -         foxtrot -
+xyz    97        1234567 -
+z      False     True    False
+"""
+        self.assertEqual(dump_options_many(runs), expected)
+        self.assertEqual(dump_options_many(iter(runs)), expected)
+
+        # one chunk per row
+        rows = list(iter_dump_options_many(runs, with_headers=False))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-1], 'z    False     True    False\n')
+
+        expected = """OPTION good_run bad_run
+xyz    97       1234567
+z      False    True
+"""
+        self.assertEqual(dump_options_many(
+            [Namespace(z=False, xyz=97), Namespace(z=True, xyz=1234567)],
+            labels=['good_run', 'bad_run']), expected)
+
+        self.assertEqual(dump_options_many([]), 'OPTION\n')
+        with self.assertRaises(ValueError):
+            dump_options_many(runs, labels=['a'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# testImportTime.py
+
+""" Test that optionz loads its submodules only as they are used. """
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import optionz
+
+# microseconds 'import optionz' may take, by 'python -X importtime'
+IMPORT_BUDGET = 20000
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(optionz.__file__)))
+
+SUBMODULES = ('optionz.core', 'optionz.dump', 'optionz.meta',
+              'optionz.parser', 'optionz.spec')
+
+
+def run_fresh(code):
+    """
+    Run code in a fresh interpreter after 'import optionz', returning
+    the optionz submodules then loaded and the 'python -X importtime'
+    report, a dictionary mapping module names to cumulative microseconds.
+    """
+    script = 'import optionz, sys\n%s\nprint(json.dumps(sorted(' \
+        'm for m in sys.modules if m.startswith("optionz."))))' % code
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import json\n' + script],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[12:].split('|')
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return json.loads(proc.stdout), times
+
+
+class TestImportTime(unittest.TestCase):
+    """ Test that optionz loads its submodules only as they are used. """
+
+    def test_bare_import(self):
+        """ Importing the package loads none of its submodules. """
+
+        loaded, times = run_fresh('')
+        self.assertEqual(loaded, [])
+        self.assertIn('optionz', times)
+        self.assertLess(times['optionz'], IMPORT_BUDGET)
+
+    def test_dump_only(self):
+        """ Dumping options loads neither specs nor the parser engine. """
+
+        loaded, _ = run_fresh(
+            'import argparse\n'
+            'optionz.dump_options(argparse.Namespace(a=1))')
+        self.assertEqual(loaded, ['optionz.core', 'optionz.dump'])
+
+    def test_dump_formats(self):
+        """ Modules used by one dump format or by diffs load on demand. """
+
+        _, times = run_fresh(
+            'import argparse\n'
+            'optionz.dump_options(argparse.Namespace(a=1))')
+        for name in ('csv', 'difflib'):
+            self.assertNotIn(name, times)
+        _, times = run_fresh(
+            'import argparse\n'
+            "optionz.dump_options(argparse.Namespace(a=1), format='csv')")
+        self.assertIn('csv', times)
+
+    def test_parse(self):
+        """ The parser engine is loaded when a spec is compiled. """
+
+        loaded, _ = run_fresh("spec = optionz.Optionz('x')")
+        self.assertEqual(loaded, ['optionz.core', 'optionz.spec'])
+        loaded, _ = run_fresh("optionz.Optionz('x').parse([])")
+        self.assertEqual(loaded, ['optionz.core', 'optionz.parser',
+                                  'optionz.spec'])
+
+    def test_attributes(self):
+        """ Every public name resolves; unknown names still fail. """
+
+        for name in optionz.__all__:
+            self.assertTrue(hasattr(optionz, name), name)
+            self.assertIn(name, dir(optionz))
+        self.assertIs(optionz.Optionz, optionz.spec.Optionz)
+        for name in SUBMODULES:
+            self.assertIn(name, sys.modules)
+        with self.assertRaises(AttributeError):
+            optionz.no_such_name    # pylint: disable=pointless-statement
+
+
+if __name__ == '__main__':
+    unittest.main()
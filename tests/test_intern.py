@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# testIntern.py
+
+""" Test slotted options and the option intern pool. """
+
+import gc
+import unittest
+
+from optionz import Optionz as Z
+from optionz import (ValType, BoolOption, ChoiceOption, IntOption,
+                     ListOption, StrOption, intern_option)
+
+
+class TestIntern(unittest.TestCase):
+    """ Test slotted options and the option intern pool. """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_slots(self):
+        """ Options carry no per-instance dictionary. """
+
+        for opt in (BoolOption('b'), ChoiceOption('c', ['x', 'y']),
+                    IntOption('i', 3), ListOption('l', -2), StrOption('s')):
+            self.assertFalse(hasattr(opt, '__dict__'))
+            with self.assertRaises(AttributeError):
+                # pylint: disable=assigning-non-slot
+                opt.extra = 1
+
+    def test_eq_and_hash(self):
+        """ Equal options hash equally; types and choices matter. """
+
+        self.assertEqual(IntOption('i', 3, 'eye'), IntOption('i', 3, 'eye'))
+        self.assertEqual(hash(IntOption('i', 3, 'eye')),
+                         hash(IntOption('i', 3, 'eye')))
+        self.assertNotEqual(IntOption('i', 3), IntOption('i', 4))
+        self.assertNotEqual(IntOption('i', 3), StrOption('i', 3))
+        self.assertNotEqual(IntOption('i'), 'i')
+        self.assertNotEqual(ChoiceOption('c', ['x', 'y']),
+                            ChoiceOption('c', ['x', 'z']))
+        self.assertEqual(len({BoolOption('v'), BoolOption('v'),
+                              BoolOption('q')}), 2)
+
+        # list defaults are hashed as tuples
+        self.assertEqual(hash(ListOption('l', [])), hash(ListOption('l', [])))
+
+    def test_pool(self):
+        """ intern_option() returns one canonical instance. """
+
+        verbose = BoolOption('verbose', False, 'talk more')
+        self.assertTrue(intern_option(verbose) is verbose)
+        self.assertTrue(
+            intern_option(BoolOption('verbose', False, 'talk more'))
+            is verbose)
+        self.assertFalse(
+            intern_option(BoolOption('verbose', True, 'talk more'))
+            is verbose)
+
+        # unhashable defaults are not interned
+        odd = StrOption('odd', {})
+        self.assertTrue(intern_option(odd) is odd)
+
+        # the pool doesn't keep options alive by itself
+        ephemeral = intern_option(BoolOption('ephemeral'))
+        del ephemeral
+        gc.collect()
+        again = BoolOption('ephemeral')
+        self.assertTrue(intern_option(again) is again)
+
+    def test_shared_across_specs(self):
+        """ Specs built with intern_options share identical options. """
+
+        specs = []
+        for name in ('build', 'deploy', 'test'):
+            spec = Z(name, intern_options=True)
+            spec.add_option('verbose', ValType.BOOL, desc='talk more')
+            spec.add_option('retries', ValType.INT, 3)
+            spec.add_choice_option('log_level', ['debug', 'info'], 'info')
+            specs.append(spec)
+        copy = Z.from_json(specs[0].to_json(), intern_options=True)
+        specs.append(copy)
+
+        for spec in specs[1:]:
+            for opt_a, opt_b in zip(specs[0]._z_options, spec._z_options):
+                self.assertTrue(opt_a is opt_b)
+
+        # without interning, options are equal but distinct
+        plain = Z('plain')
+        verbose = plain.add_option('verbose', ValType.BOOL, desc='talk more')
+        self.assertEqual(verbose, specs[0]._z_options[0])
+        self.assertFalse(verbose is specs[0]._z_options[0])
+
+    def test_types_kept_apart(self):
+        """ Equal defaults or choices of different types aren't merged. """
+
+        spec_a = Z('a', intern_options=True)
+        spec_b = Z('b', intern_options=True)
+        spec_a.add_option('count', ValType.INT, True)
+        count = spec_b.add_option('count', ValType.INT, 1)
+        self.assertIs(type(count.default), int)
+        self.assertNotEqual(count, spec_a._z_options[0])
+
+        spec_a.add_choice_option('level', [1, 2], 1)
+        level = spec_b.add_choice_option('level', [True, 2], 1)
+        self.assertIs(type(level.choices[0]), bool)
+        self.assertNotEqual(level, spec_a._z_options[1])
+
+        self.assertNotEqual(IntOption('x', 1), IntOption('x', 1.0))
+        self.assertEqual(IntOption('x', [1]), IntOption('x', [1]))
+        self.assertNotEqual(IntOption('x', [1]), IntOption('x', (1,)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,13 @@
 
 """ Test metaclass construction. """
 
+import contextlib
+import io
+import threading
+import time
 import unittest
 
-# from optionz import optionz_maker, Singleton, MetaOption
+from optionz import optionz_maker, Singleton, MetaOption
 
 
 class TestMetaClasses(unittest.TestCase):
@@ -19,45 +23,101 @@ class TestMetaClasses(unittest.TestCase):
 
     # generic test(s) -----------------------------------------------
 
-#   def test_metaclass_with_keywords(self):
-#       """ Test passing metaclass attributes as keywords.  """
+    def test_metaclass_with_keywords(self):
+        """ Test passing metaclass attributes as keywords.  """
 
-#       # pylint: disable=too-few-public-methods
-#       class MyOption(metaclass=MetaOption, a__=15, b__=25):
-#           """ Notice the items being passed as parameters to the class """
-#           pass
+        # pylint: disable=too-few-public-methods
+        class MyOption(metaclass=MetaOption, a__=15, b__=25):
+            """ Notice the items being passed as parameters to the class """
+            pass
 
-#       obj = MyOption()
+        obj = MyOption()
 
-#       self.assertFalse(obj is None)
-#       self.assertEqual(len(obj.__dict__), 0)
-#       # pylint: disable=no-member
-#       self.assertEqual(obj.a__, 15)
-#       # pylint: disable=no-member
-#       self.assertEqual(obj.b__, 25)
-#       # DEBUG
-#       print("test_metaclass_with_keywors() succeeded")
-#       # END
+        self.assertFalse(obj is None)
+        self.assertEqual(len(obj.__dict__), 0)
+        # pylint: disable=no-member
+        self.assertEqual(obj.a__, 15)
+        # pylint: disable=no-member
+        self.assertEqual(obj.b__, 25)
 
-#   # singleton -----------------------------------------------------
+        with self.assertRaises(AttributeError):
+            MyOption.a__ = 16
+        self.assertEqual(MyOption.a__, 15)
 
-#   def test_singleton(self):
-#       """ Verify that a singleton really is such. """
+    # singleton -----------------------------------------------------
 
-#       # pylint: disable=too-few-public-methods
-#       class Foo(metaclass=Singleton):
-#           """ Simplest singleton. """
-#           pass
+    def test_singleton(self):
+        """ Verify that a singleton really is such. """
+
+        # pylint: disable=too-few-public-methods
+        class Foo(metaclass=Singleton):
+            """ Simplest singleton. """
+            pass
+
+        foo1 = Foo()
+        foo2 = Foo()
+
+        self.assertEqual(foo1, foo2)
+        # addresses are the same, so this is a true singleton
+        self.assertTrue(foo1 is foo2)
+
+        # a subclass is a singleton in its own right
+        class Bar(Foo):
+            """ Singleton derived from a singleton. """
+            pass
+
+        bar1 = Bar()
+        self.assertTrue(bar1 is Bar())
+        self.assertFalse(bar1 is foo1)
+        self.assertTrue(Foo() is foo1)
+
+    def test_singleton_quietly(self):
+        """ Verify that neither metaclass writes to stdout. """
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            class Quiet(metaclass=Singleton):
+                """ Singleton built silently. """
+                pass
+
+            class Hush(metaclass=MetaOption, a__=1):
+                """ Class built silently. """
+                pass
+            Quiet()
+            Quiet()
+            Hush()
+        self.assertEqual(out.getvalue(), '')
+
+    def test_singleton_threads(self):
+        """ Verify that racing threads all get the same instance. """
+
+        built = []
+
+        class Slow(metaclass=Singleton):
+            """ Singleton which takes a while to build. """
+
+            def __init__(self):
+                built.append(self)
+                time.sleep(0.05)
+
+        barrier = threading.Barrier(8)
+        seen = []
 
-#       foo1 = Foo()
-#       foo2 = Foo()
+        def fetch():
+            """ Fetch the singleton once every thread is ready. """
+            barrier.wait()
+            seen.append(Slow())
 
-#       self.assertEqual(foo1, foo2)
-#       # addresses are the same, so this is a true singleton
-#       self.assertTrue(foo1 is foo2)
-#       # DEBUG
-#       print("test_singleton() succeeded")
-#       # END
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len(seen), 8)
+        for obj in seen:
+            self.assertTrue(obj is built[0])
 
 #   def test_optionz_as_flipped_singleton(self):
 #       """ Test an Optionz object as a singleton. """
@@ -130,47 +190,58 @@ class TestMetaClasses(unittest.TestCase):
 #       self.assertEqual(Koo.a79, 79)
 #       self.assertEqual(koo1.a79, 79)
 
-#   def test_optionz_maker(self):
-#       """ Test another Optionz singleton created with keyword parameters."""
+    def test_optionz_maker(self):
+        """ Test another Optionz singleton created with keyword parameters."""
 
-#       kwargs = {'a13': 13, 'b__': 1947, 'c__': 'mike'}
+        kwargs = {'a13': 13, 'b__': 1947, 'c__': 'mike'}
 
-#       koo = optionz_maker(**kwargs)
+        koo = optionz_maker(**kwargs)
 
-#       koo1 = koo()        # TypeError: type() takes 1 or 3 arguments
-#       koo2 = koo()
+        koo1 = koo()
+        koo2 = koo()
 
-#       # addresses are the same, so this is a true singleton too
-#       self.assertTrue(koo1 is koo2)
+        # addresses are the same, so this is a true singleton too
+        self.assertTrue(koo1 is koo2)
 
-#       #####################################################################
-#       # NOW FAILS: "AttributeError: type object 'Moo' has no attribute 'a13'
-#       self.assertEqual(koo1.a13, 13)
-#       #####################################################################
+        self.assertEqual(koo1.a13, 13)
+        self.assertEqual(koo1.b__, 1947)
+        self.assertEqual(koo1.c__, 'mike')
 
-#       self.assertEqual(koo1.b__, 1947)
-#       self.assertEqual(koo1.c__, 'mike')
+        # immutability the Python way
+        try:
+            koo1.a13 = 1066
+            self.fail(
+                "successfully changed instance attribute")  # pragma: no cover
+        except AttributeError:
+            pass
 
-#       # immutability the Python way
-#       try:
-#           koo1.a13 = 1066
-#           self.assertEqual(koo1.a13, 1066)
-#           self.fail(
-#               "successfully changed instance attribute")  # pragma: no cover
-#       except AttributeError:
-#           pass
+        # we want this assignment to fail
+        try:
+            koo.a13 = 2718281828459
+            self.fail(
+                "successfully changed class attribute")   # pragma: no cover
+        except AttributeError:
+            pass
+        self.assertEqual(koo.a13, 13)
 
-#       # we want this assignment to fail
-#       try:
-#           koo.a13 = 2718281828459
-#           self.fail(
-#               "successfully changed class attribute")   # pragma: no cover
-#       except AttributeError:
-#           pass
-#       self.assertEqual(koo.a13, 13)
+        # we want this value to be unchanged as well
+        self.assertEqual(koo1.a13, 13)
+
+    def test_optionz_maker_cache(self):
+        """ Test that equal keyword parameters share one class. """
+
+        koo = optionz_maker(a13=13, c__='mike')
+        self.assertTrue(optionz_maker(c__='mike', a13=13) is koo)
+        self.assertTrue(optionz_maker(c__='mike', a13=13)() is koo())
+
+        # equal values of different types are kept apart
+        self.assertFalse(optionz_maker(a13=13.0, c__='mike') is koo)
+        self.assertFalse(optionz_maker(a13=13) is koo)
 
-#       # we want this value to be unchanged as well
-#       self.assertEqual(koo1.a13, 13)
+        # unhashable values work, but aren't cached
+        loo = optionz_maker(a13=[13])
+        self.assertEqual(loo().a13, [13])
+        self.assertFalse(optionz_maker(a13=[13]) is loo)
 
 
 if __name__ == '__main__':
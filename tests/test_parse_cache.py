@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# testParseCache.py
+
+""" Test memoizing parse results for repeated argument vectors. """
+
+import os
+import tempfile
+import unittest
+
+from optionz import Optionz as Z
+from optionz import OptionzError, ParseCacheInfo, ValType
+
+
+class TestParseCache(unittest.TestCase):
+    """ Test memoizing parse results for repeated argument vectors. """
+
+    def setUp(self):
+        spec = Z('jobs')
+        spec.add_option('verbose', ValType.BOOL, short_tag='v')
+        spec.add_option('retries', ValType.INT, 3)
+        spec.add_list_option('shards', 0, ValType.INT)
+        self.compiled = spec.compile()
+
+    def tearDown(self):
+        pass
+
+    def test_disabled(self):
+        """ By default nothing is memoized. """
+
+        first = self.compiled.parse(['-v'])
+        self.assertIsNot(self.compiled.parse(['-v']), first)
+        self.assertEqual(self.compiled.parse_cache_info(),
+                         ParseCacheInfo(0, 0, 0, 0, 0))
+
+    def test_hits_and_misses(self):
+        """ A repeated argument vector returns the same result object. """
+
+        self.compiled.enable_parse_cache(8)
+        first = self.compiled.parse(['-v', '--shards', '1', '2'])
+        again = self.compiled.parse(('-v', '--shards', '1', '2'))
+        self.assertIs(again, first)
+        self.assertEqual(again.shards.tolist(), [1, 2])
+        self.assertIsNot(self.compiled.parse(['-v']), first)
+        self.assertEqual(self.compiled.parse_cache_info(),
+                         ParseCacheInfo(1, 2, 0, 8, 2))
+
+        self.compiled.clear_parse_cache()
+        self.assertEqual(self.compiled.parse_cache_info(),
+                         ParseCacheInfo(0, 0, 0, 8, 0))
+        self.assertIsNot(self.compiled.parse(['-v']), first)
+
+    def test_shared_results_immutable(self):
+        """ Nothing reachable from a cached result can be changed. """
+
+        self.compiled.enable_parse_cache()
+        first = self.compiled.parse(['--shards', '1', '2'])
+        with self.assertRaises(TypeError):
+            first.shards[0] = 99
+        with self.assertRaises(TypeError):
+            first.shards.obj[0] = 99
+        again = self.compiled.parse(['--shards', '1', '2'])
+        self.assertIs(again, first)
+        self.assertEqual(again.shards.tolist(), [1, 2])
+
+    def test_eviction(self):
+        """ The least recently used results are dropped first. """
+
+        self.compiled.enable_parse_cache(2)
+        one = self.compiled.parse(['--retries', '1'])
+        self.compiled.parse(['--retries', '2'])
+        self.assertIs(self.compiled.parse(['--retries', '1']), one)
+        self.compiled.parse(['--retries', '3'])       # evicts 2
+        self.assertIs(self.compiled.parse(['--retries', '1']), one)
+        info = self.compiled.parse_cache_info()
+        self.assertEqual((info.evictions, info.currsize), (1, 2))
+        self.compiled.parse(['--retries', '2'])       # evicts 3
+        self.assertEqual(self.compiled.parse_cache_info(),
+                         ParseCacheInfo(2, 4, 2, 2, 2))
+
+        self.compiled.enable_parse_cache(1)           # shrinks
+        self.assertEqual(self.compiled.parse_cache_info().evictions, 3)
+        self.compiled.enable_parse_cache(0)           # disables
+        self.assertIsNot(self.compiled.parse(['--retries', '2']),
+                         self.compiled.parse(['--retries', '2']))
+        with self.assertRaises(ValueError):
+            self.compiled.enable_parse_cache(-1)
+
+    def test_not_memoized(self):
+        """ Failures and argument files are never memoized. """
+
+        self.compiled.enable_parse_cache()
+        for _ in range(2):
+            with self.assertRaises(OptionzError):
+                self.compiled.parse(['--retries', 'x'])
+        self.assertEqual(self.compiled.parse_cache_info().currsize, 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'args')
+            with open(path, 'w') as file:
+                file.write('--retries\n5\n')
+            self.assertEqual(
+                self.compiled.parse(['@' + path], arg_files=True).retries, 5)
+            with open(path, 'w') as file:
+                file.write('--retries\n6\n')
+            self.assertEqual(
+                self.compiled.parse(['@' + path], arg_files=True).retries, 6)
+        self.assertEqual(self.compiled.parse_cache_info().currsize, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# testParseMany.py
+
+""" Test parsing many argument vectors, in and out of process. """
+
+import multiprocessing
+import unittest
+
+from optionz import Optionz as Z
+from optionz import OptionzError, ValType
+
+
+def make_deploy_spec():
+    """ Build the spec for the 'deploy' subcommand. """
+    spec = Z('deploy')
+    spec.add_choice_option('env', ['staging', 'prod'], 'staging')
+    spec.add_list_option('hosts', 0, ValType.INT)
+    return spec
+
+
+class TestParseMany(unittest.TestCase):
+    """ Test parsing many argument vectors, in and out of process. """
+
+    def setUp(self):
+        self.spec = Z('jobs')
+        self.spec.add_option('verbose', ValType.BOOL, short_tag='v')
+        self.spec.add_option('retries', ValType.INT, 3)
+        self.spec.add_list_option('shards', 0, ValType.INT)
+        self.spec.add_list_option('files', 0)
+        self.spec.add_subcommand('deploy',
+                                 'test_parse_many:make_deploy_spec')
+        self.argvs = []
+        for ndx in range(1000):
+            argv = ['--shards', str(ndx), str(ndx + 1),
+                    '--files', 'f%d' % ndx, '--retries', str(ndx)]
+            if ndx % 3 == 0:
+                argv.append('-v')
+            if ndx % 7 == 0:
+                argv += ['deploy', '--env', 'prod', '--hosts', '1', '2']
+            self.argvs.append(argv)
+
+    def tearDown(self):
+        pass
+
+    def test_serial(self):
+        """ Without workers, results are parsed in this process. """
+
+        results = self.spec.parse_many(iter(self.argvs))
+        for argv, result in zip(self.argvs, results):
+            self.assertEqual(result, self.spec.parse(argv))
+
+    def test_workers(self):
+        """ Worker processes return the same results, in order. """
+
+        expected = [self.spec.parse(argv) for argv in self.argvs]
+        results = list(self.spec.parse_many(iter(self.argvs), workers=2,
+                                            chunksize=64))
+        self.assertEqual(len(results), len(expected))
+        for got, want in zip(results, expected):
+            self.assertEqual(got, want)
+            self.assertTrue(type(got) is type(want))
+            self.assertEqual(got.shards.tolist(), want.shards.tolist())
+            self.assertTrue(got.shards.readonly)
+        self.assertEqual(results[7].sub_options.env, 'prod')
+        self.assertEqual(results[7].sub_options.hosts.tolist(), [1, 2])
+        self.assertIsNone(results[8].sub_options)
+
+    def test_spawned_workers(self):
+        """ Specs must pickle, so that workers may be spawned. """
+
+        spec = Z('jobs')
+        spec.add_option('retries', ValType.INT, 3)
+        spec.add_subcommand('deploy', lambda: make_deploy_spec())
+        argvs = [['--retries', '1'], ['deploy', '--env', 'prod']]
+        self.assertEqual(len(list(spec.parse_many(argvs))), 2)
+        with self.assertRaises(OptionzError):
+            spec.parse_many(argvs, workers=2)       # at once, unconsumed
+
+        # an Optionz subcommand pickles, even once compiled
+        deploy = make_deploy_spec()
+        deploy.compile()
+        spec = Z('jobs')
+        spec.add_option('retries', ValType.INT, 3)
+        spec.add_subcommand('deploy', deploy)
+        context = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        try:
+            results = list(spec.parse_many(argvs, workers=2, chunksize=1))
+        finally:
+            multiprocessing.set_start_method(context, force=True)
+        self.assertEqual(results, [spec.parse(argv) for argv in argvs])
+        self.assertEqual(results[1].sub_options.env, 'prod')
+
+    def test_errors(self):
+        """ Errors are raised, or returned in place. """
+
+        argvs = [['-v'], ['--retries', 'x'], ['--nosuch'], []]
+        for workers in (None, 2):
+            with self.assertRaises(OptionzError):
+                list(self.spec.parse_many(argvs, workers))
+            results = list(self.spec.parse_many(argvs, workers,
+                                                errors='return'))
+            self.assertTrue(results[0].verbose)
+            self.assertTrue(isinstance(results[1], OptionzError))
+            self.assertTrue(isinstance(results[2], OptionzError))
+            self.assertFalse(results[3].verbose)
+        with self.assertRaises(ValueError):
+            self.spec.parse_many(argvs, errors='ignore')
+
+        # results before a failure are yielded, then it is raised
+        argvs = [['--retries', str(ndx)] for ndx in range(10)] + \
+            [['--nosuch'], ['-v']]
+        for workers in (None, 2):
+            results = []
+            with self.assertRaises(OptionzError):
+                for result in self.spec.parse_many(argvs, workers):
+                    results.append(result)
+            self.assertEqual([result.retries for result in results],
+                             list(range(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# testParser.py
+
+""" Test compiling an Optionz spec and parsing command lines with it. """
+
+import pickle
+import unittest
+
+from optionz import Optionz as Z
+from optionz import CompiledOptionz, OptionzError, OptionzResult, ValType
+
+
+class TestParser(unittest.TestCase):
+    """ Test compiling an Optionz spec and parsing command lines with it. """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    # utility functions #############################################
+
+    @staticmethod
+    def make_spec():
+        """ Return an Optionz with one option of each type. """
+        my_optz = Z('fred')
+        my_optz.add_option('bO', ValType.BOOL, short_tag='b')
+        my_optz.add_choice_option('cO', ['a', 'b', 'c'], 'b', short_tag='c')
+        my_optz.add_option('fO', ValType.FLOAT, 1.5)
+        my_optz.add_option('iO', ValType.INT, 7, short_tag='i')
+        my_optz.add_option('lO', ValType.LIST, -3)
+        my_optz.add_option('sO', ValType.STR, 'abc')
+        return my_optz
+
+    # actual unit tests #############################################
+
+    def test_compile(self):
+        """ Compiled form is cached until the spec changes. """
+
+        my_optz = self.make_spec()
+        compiled = my_optz.compile()
+        self.assertTrue(isinstance(compiled, CompiledOptionz))
+        self.assertTrue(my_optz.compile() is compiled)
+        self.assertEqual(compiled.fields,
+                         ('bO', 'cO', 'fO', 'iO', 'lO', 'sO', 'help'))
+
+        my_optz.add_option('zO', ValType.INT)
+        self.assertFalse(my_optz.compile() is compiled)
+        self.assertEqual(len(my_optz), 7)     # 'help' is not counted
+
+    def test_defaults(self):
+        """ An empty command line yields the default values. """
+
+        result = self.make_spec().parse([])
+        self.assertEqual(result.bO, False)
+        self.assertEqual(result.cO, 'b')
+        self.assertEqual(result.fO, 1.5)
+        self.assertEqual(result.iO, 7)
+        self.assertEqual(result.lO, ())
+        self.assertEqual(result.sO, 'abc')
+        self.assertEqual(result.help, False)
+
+    def test_long_and_short_tags(self):
+        """ Values are converted according to the option's ValType. """
+
+        result = self.make_spec().parse(
+            ['--bO', '-c', 'a', '--fO', '-2.25', '-i', '52',
+             '--lO', 'x', 'y', '--sO', 'george', '-h'])
+        self.assertEqual(result.bO, True)
+        self.assertEqual(result.cO, 'a')
+        self.assertEqual(result.fO, -2.25)
+        self.assertEqual(result.iO, 52)
+        self.assertEqual(result.lO, ('x', 'y'))
+        self.assertEqual(result.sO, 'george')
+        self.assertEqual(result.help, True)
+
+    def test_result_class(self):
+        """ Results are immutable instances of one generated class. """
+
+        compiled = self.make_spec().compile()
+        result_class = compiled.result_class
+        self.assertTrue(issubclass(result_class, OptionzResult))
+        self.assertEqual(result_class.__name__, 'fred')
+        self.assertEqual(result_class._fields, compiled.fields)
+
+        res_a = compiled.parse(['-i', '3'])
+        res_b = compiled.parse([])
+        self.assertTrue(type(res_a) is result_class)
+        self.assertTrue(type(res_b) is result_class)
+        self.assertFalse(hasattr(res_a, '__dict__'))
+
+        # tuple-like
+        self.assertEqual(res_a[3], 3)
+        self.assertEqual(len(res_a), len(compiled.fields))
+        self.assertEqual(res_a._asdict()['iO'], 3)
+        self.assertEqual(res_b, compiled.parse([]))
+        self.assertTrue(repr(res_b).startswith("fred(bO=False, cO='b'"))
+
+        # and immutable
+        with self.assertRaises(AttributeError):
+            res_a.iO = 4
+        with self.assertRaises(AttributeError):
+            res_a.new_attr = 4
+        with self.assertRaises(TypeError):
+            # pylint: disable=unsupported-assignment-operation
+            res_a[3] = 4
+        self.assertEqual(res_a.iO, 3)
+
+    def test_pickle(self):
+        """ Results, numeric lists and all, survive pickling. """
+
+        my_optz = Z('pickled')
+        my_optz.add_option('count', ValType.INT, 2)
+        my_optz.add_list_option('ids', 0, ValType.INT)
+        my_optz.add_list_option('ratios', -3, ValType.FLOAT)
+        my_optz.add_list_option('names', 0)
+        compiled = my_optz.compile()
+
+        for args in ([], ['--count', '5', '--ids', '1', '2', '--ratios',
+                          '0.5', '--names', 'a', 'b']):
+            result = compiled.parse(args)
+            for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+                copy = pickle.loads(pickle.dumps(result, protocol))
+                self.assertTrue(type(copy) is compiled.result_class)
+                self.assertEqual(copy, result)
+                self.assertEqual(copy.ids.tolist(), result.ids.tolist())
+                self.assertEqual(copy.ratios.format, 'd')
+                self.assertTrue(copy.ids.readonly)
+
+        # names which are not identifiers are still reachable
+        my_optz = Z('odd')
+        my_optz.add_option('12', ValType.INT, 12)
+        self.assertEqual(getattr(my_optz.parse([]), '12'), 12)
+
+        my_optz.add_option('_fields', ValType.INT)
+        with self.assertRaises(OptionzError):
+            my_optz.compile()
+
+    def test_list_sizes(self):
+        """ ListOption sizes bound the number of values consumed. """
+
+        my_optz = Z('lists')
+        my_optz.add_option('any', ValType.LIST, 0)
+        my_optz.add_option('upto', ValType.LIST, -2)
+        my_optz.add_option('exact', ValType.LIST, 2)
+        my_optz.add_option('sO', ValType.STR)
+
+        result = my_optz.parse(['--any', 'a', 'b', 'c', 'd', '--sO', 'x'])
+        self.assertEqual(result.any, ('a', 'b', 'c', 'd'))
+        self.assertEqual(result.sO, 'x')
+
+        # a third value is not consumed, so is unexpected
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--upto', 'a', 'b', 'c'])
+        # repeating a tag adds values, within the same limits
+        result = my_optz.parse(['--upto', 'a', '--upto', 'b'])
+        self.assertEqual(result.upto, ('a', 'b'))
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--upto', 'a', '--upto', 'b', '-5'])
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--upto', 'a', 'b', '--upto', 'c'])
+
+        result = my_optz.parse(['--exact', '1', '2'])
+        self.assertEqual(result.exact, ('1', '2'))
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--exact', '1'])
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['--exact', '1', '2', '--exact', '3', '4'])
+
+    def test_compound_tags(self):
+        """ Clustered short flags, attached values, and '--tag=value'. """
+
+        my_optz = Z('tar')
+        my_optz.add_option('extract', ValType.BOOL, short_tag='x')
+        my_optz.add_option('verbose', ValType.BOOL, short_tag='v')
+        my_optz.add_option('file', ValType.STR, short_tag='f')
+        my_optz.add_option('blocks', ValType.INT, 20, short_tag='b')
+        my_optz.add_list_option('ids', -3, ValType.INT, short_tag='i')
+        my_optz.add_list_option('names', 0, short_tag='n')
+
+        result = my_optz.parse(['-xvf', 'a.tar', '-b52'])
+        self.assertTrue(result.extract)
+        self.assertTrue(result.verbose)
+        self.assertEqual(result.file, 'a.tar')
+        self.assertEqual(result.blocks, 52)
+
+        result = my_optz.parse(['-vfa.tar', '--blocks=7', '--file=x=y'])
+        self.assertTrue(result.verbose)
+        self.assertFalse(result.extract)
+        self.assertEqual(result.file, 'x=y')
+        self.assertEqual(result.blocks, 7)
+
+        # an empty value may be given with '='
+        self.assertEqual(my_optz.parse(['--file=']).file, '')
+
+        # attached values are the first items of lists
+        result = my_optz.parse(['-i1', '2', '3', '--names=a', 'b', '-nc'])
+        self.assertEqual(result.ids.tolist(), [1, 2, 3])
+        self.assertEqual(result.names, ('a', 'b', 'c'))
+        result = my_optz.parse(['--ids=-1', '-2'])
+        self.assertEqual(result.ids.tolist(), [-1, -2])
+        with self.assertRaises(OptionzError):
+            my_optz.parse(['-i1', '2', '3', '4'])
+
+        for args in (['-xq'],               # no such short tag
+                     ['-xé'],
+                     ['--verbose=yes'],     # flags take no values
+                     ['--nosuch=1'],
+                     ['--=1'],
+                     ['-bx'],               # 'x' is the value, not an int
+                     ['-xb']):              # no value for 'b'
+            with self.assertRaises(OptionzError):
+                my_optz.parse(args)
+
+    def test_abbreviations(self):
+        """ Unambiguous prefixes of long tags are accepted. """
+
+        my_optz = Z('fred')
+        my_optz.add_option('verbose', ValType.BOOL)
+        my_optz.add_option('version', ValType.BOOL)
+        my_optz.add_option('verb', ValType.STR)
+        my_optz.add_option('count', ValType.INT)
+        for ndx in range(1000):
+            my_optz.add_option('flag%04d' % ndx, ValType.BOOL)
+
+        result = my_optz.parse(['--verbo', '--vers', '--co', '3'])
+        self.assertTrue(result.verbose)
+        self.assertTrue(result.version)
+        self.assertEqual(result.count, 3)
+        self.assertEqual(my_optz.parse(['--c=4']).count, 4)
+        self.assertTrue(my_optz.parse(['--flag0999']).flag0999)
+        self.assertTrue(my_optz.parse(['--flag0998']).flag0998)
+
+        # an exact match wins over longer tags
+        self.assertEqual(my_optz.parse(['--verb', 'x']).verb, 'x')
+
+        for args in (['--ver'], ['--v'], ['--flag1'], ['--counts', '1']):
+            with self.assertRaises(OptionzError):
+                my_optz.parse(args)
+        try:
+            my_optz.parse(['--ver'])
+        except OptionzError as exc:
+            self.assertTrue('--verb, --verbose, --version' in str(exc))
+
+    def test_suggestions(self):
+        """ Unknown long tags get 'did you mean' suggestions. """
+
+        my_optz = Z('fred')
+        for name in ('verbose', 'version', 'dry_run', 'log_level'):
+            my_optz.add_option(name, ValType.BOOL)
+        for ndx in range(5000):
+            my_optz.add_option('opt%04d' % ndx, ValType.BOOL)
+        compiled = my_optz.compile()
+
+        self.assertEqual(compiled.suggest('verbsoe'), ['verbose'])
+        self.assertEqual(compiled.suggest('dryrun'), ['dry_run'])
+        self.assertEqual(compiled.suggest('log_levels'), ['log_level'])
+        self.assertEqual(compiled.suggest('versoin'), ['version'])
+        self.assertEqual(compiled.suggest('verison'), ['version'])
+        self.assertEqual(compiled.suggest('opt123'),
+                         ['opt0123', 'opt1023', 'opt1123'])
+        self.assertEqual(compiled.suggest('opt123', limit=1), ['opt0123'])
+        self.assertEqual(compiled.suggest('quux'), [])
+
+        try:
+            compiled.parse(['--verbsoe'])
+            self.fail("accepted misspelt option")   # pragma: no cover
+        except OptionzError as exc:
+            self.assertTrue("did you mean --verbose?" in str(exc))
+        try:
+            compiled.parse(['--quux'])
+            self.fail("accepted unknown option")    # pragma: no cover
+        except OptionzError as exc:
+            self.assertFalse("did you mean" in str(exc))
+
+    def test_typed_lists(self):
+        """ INT and FLOAT lists are converted in bulk into arrays. """
+
+        my_optz = Z('typed')
+        my_optz.add_list_option('shards', 0, ValType.INT, short_tag='s')
+        my_optz.add_list_option('limits', -3, ValType.FLOAT)
+        my_optz.add_list_option('names', 0)
+        with self.assertRaises(OptionzError):
+            my_optz.add_list_option('flags', 0, ValType.BOOL)
+
+        result = my_optz.parse([])
+        self.assertEqual(len(result.shards), 0)
+        self.assertEqual(result.names, ())
+
+        result = my_optz.parse(['-s', '3', '-1', '4', '--limits', '0.5',
+                                '-2e3', '--names', 'x', '-s', '15'])
+        shards = result.shards
+        self.assertTrue(isinstance(shards, memoryview))
+        self.assertTrue(shards.readonly)
+        self.assertEqual(shards.format, 'q')
+        self.assertEqual(shards.tolist(), [3, -1, 4, 15])
+        self.assertEqual(shards[1], -1)
+        self.assertEqual(result.limits.tolist(), [0.5, -2000.0])
+        self.assertEqual(result.names, ('x',))
+        with self.assertRaises(TypeError):
+            shards[0] = 7
+        self.assertEqual(repr(my_optz.parse(['-s', '2', '--limits', '1'])),
+                         'typed(shards=[2], limits=[1.0], names=(), '
+                         'help=False)')
+
+        # repeated tags add to one list or array, frozen once
+        result = my_optz.parse(['-s', '1', '-s2', '--names', 'a'] * 1000)
+        self.assertEqual(result.shards.tolist(), [1, 2] * 1000)
+        self.assertTrue(result.shards.readonly)
+        self.assertEqual(result.names, ('a',) * 1000)
+
+        self.assertEqual(my_optz.parse(['-s', '1', '2']),
+                         my_optz.parse(['-s', '1', '2']))
+        for args in (['-s', '1', 'x'],
+                     ['-s', str(1 << 64)],
+                     ['--limits', '1', 'z']):
+            with self.assertRaises(OptionzError):
+                my_optz.parse(args)
+
+        # item types are part of the spec
+        other = Z('typed')
+        other.add_list_option('shards', 0, ValType.STR, short_tag='s')
+        other.add_list_option('limits', -3, ValType.FLOAT)
+        other.add_list_option('names', 0)
+        self.assertNotEqual(other.fingerprint(), my_optz.fingerprint())
+        copy = Z.from_json(my_optz.to_json())
+        self.assertEqual(copy.fingerprint(), my_optz.fingerprint())
+
+    def test_errors(self):
+        """ Bad command lines raise OptionzError. """
+
+        my_optz = self.make_spec()
+        for args in (['--nosuch'],
+                     ['-q'],
+                     ['stray'],
+                     ['--iO'],
+                     ['--iO', 'abc'],
+                     ['--fO', 'xyz'],
+                     ['-c', 'z']):
+            with self.assertRaises(OptionzError):
+                my_optz.parse(args)
+
+    def test_short_tags(self):
+        """ Short tags must be single characters, used once. """
+
+        my_optz = Z('tags')
+        my_optz.add_option('verbose', ValType.BOOL, short_tag='v')
+        self.assertEqual(my_optz.short_tag('verbose'), 'v')
+        with self.assertRaises(ValueError):
+            my_optz.add_option('version', ValType.BOOL, short_tag='v')
+        with self.assertRaises(OptionzError):
+            my_optz.add_option('quiet', ValType.BOOL, short_tag='qq')
+
+        # a spec may claim 'help' or '-h' for itself
+        my_optz.add_option('host', ValType.STR, short_tag='h')
+        result = my_optz.parse(['-h', 'example.com', '--help'])
+        self.assertEqual(result.host, 'example.com')
+        self.assertEqual(result.help, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
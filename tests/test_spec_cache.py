@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# testSpecCache.py
+
+""" Test spec fingerprints and the on-disk cache of compiled specs. """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from optionz import Optionz as Z
+from optionz import CACHE_EXT, CompiledOptionz, OptionzError, ValType
+
+
+class TestSpecCache(unittest.TestCase):
+    """ Test spec fingerprints and the on-disk cache of compiled specs. """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    # utility functions #############################################
+
+    @staticmethod
+    def make_spec(desc='how many'):
+        """ Return a small Optionz spec. """
+        my_optz = Z('fred')
+        my_optz.add_option('verbose', ValType.BOOL, short_tag='v')
+        my_optz.add_choice_option('color', ['red', 'green'], 'red')
+        my_optz.add_option('count', ValType.INT, 3, desc)
+        my_optz.add_option('files', ValType.LIST, 0)
+        return my_optz
+
+    # actual unit tests #############################################
+
+    def test_fingerprint(self):
+        """ Fingerprints track every part of the spec's content. """
+
+        fprint = self.make_spec().fingerprint()
+        self.assertEqual(len(fprint), 64)
+        self.assertEqual(self.make_spec().fingerprint(), fprint)
+        self.assertNotEqual(self.make_spec('how few').fingerprint(), fprint)
+
+        my_optz = self.make_spec()
+        my_optz.add_option('ratio', ValType.FLOAT, 0.5)
+        self.assertNotEqual(my_optz.fingerprint(), fprint)
+
+    def test_cache_round_trip(self):
+        """ A second lookup under the same key loads from disk. """
+
+        args = ['-v', '--color', 'green', '--count', '5', '--files', 'a', 'b',
+                '--nums', '1', '2', '-h']
+        built = []
+
+        def build():
+            """ Return the spec, counting calls. """
+            my_optz = self.make_spec()
+            my_optz.add_list_option('nums', 0, ValType.INT)
+            built.append(my_optz)
+            return my_optz
+
+        compiled_a = CompiledOptionz.cached(self.cache_dir, 'fred 1.0', build)
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertTrue(os.listdir(self.cache_dir)[0].endswith(CACHE_EXT))
+
+        compiled_b = CompiledOptionz.cached(self.cache_dir, 'fred 1.0', build)
+        self.assertEqual(len(built), 1)         # not built again
+        self.assertFalse(compiled_a is compiled_b)
+        self.assertEqual(compiled_b.fields, compiled_a.fields)
+        self.assertEqual(compiled_b.parse(args), compiled_a.parse(args))
+        self.assertEqual(compiled_b.parse(args).files, ('a', 'b'))
+        self.assertEqual(list(compiled_b.parse(args).nums), [1, 2])
+        self.assertEqual(list(compiled_b.parse([]).nums), [])
+        self.assertEqual(compiled_b.parse(['--col', 'red', '-vh']),
+                         compiled_a.parse(['--col', 'red', '-vh']))
+        with self.assertRaises(OptionzError):
+            compiled_b.parse(['--color', 'blue'])
+
+        CompiledOptionz.cached(self.cache_dir, 'fred 1.1', build)
+        self.assertEqual(len(built), 2)         # a new key builds anew
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_bad_cache_files(self):
+        """ Corrupt or missing cache files are ignored. """
+
+        path = os.path.join(self.cache_dir, 'junk' + CACHE_EXT)
+        self.assertIsNone(CompiledOptionz.load(path))
+        with open(path, 'wb') as file:
+            file.write(b'\x00not marshal data')
+        self.assertIsNone(CompiledOptionz.load(path))
+
+        CompiledOptionz.cached(self.cache_dir, 'fred', self.make_spec)
+        names = set(os.listdir(self.cache_dir)) - {'junk' + CACHE_EXT}
+        path = os.path.join(self.cache_dir, names.pop())
+        with open(path, 'wb') as file:
+            file.write(b'garbage')
+        result = CompiledOptionz.cached(
+            self.cache_dir, 'fred', self.make_spec).parse(['-v'])
+        self.assertTrue(result.verbose)
+        self.assertIsNotNone(CompiledOptionz.load(path))    # rewritten
+
+    def test_unmarshallable_default(self):
+        """ Specs whose defaults can't be marshalled are not cached. """
+
+        my_optz = Z('odd')
+        my_optz.add_option('when', ValType.STR, default=object())
+        compiled = CompiledOptionz.cached(self.cache_dir, 'odd',
+                                          lambda: my_optz)
+        self.assertFalse(compiled.save(os.path.join(self.cache_dir, 'x')))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_failed_save(self):
+        """ A save which fails part way leaves no temporary file behind. """
+
+        compiled = self.make_spec().compile()
+        path = os.path.join(self.cache_dir, 'taken')
+        os.mkdir(path)          # so the final rename fails
+        self.assertFalse(compiled.save(path))
+        self.assertEqual(os.listdir(self.cache_dir), ['taken'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# testSubcommands.py
+
+""" Test lazily built subcommands. """
+
+import unittest
+
+from optionz import Optionz as Z
+from optionz import OptionzError, ValType
+
+BUILT = []          # names of subcommand specs built so far
+
+
+def make_build_spec():
+    """ Build the spec for the 'build' subcommand. """
+    BUILT.append('build')
+    spec = Z('build')
+    spec.add_option('jobs', ValType.INT, 1, short_tag='j')
+    spec.add_list_option('targets', 0)
+    return spec
+
+
+def make_deploy_spec():
+    """ Build the spec for the 'deploy' subcommand. """
+    BUILT.append('deploy')
+    spec = Z('deploy')
+    spec.add_choice_option('env', ['staging', 'prod'], 'staging')
+    return spec
+
+
+class TestSubcommands(unittest.TestCase):
+    """ Test lazily built subcommands. """
+
+    def setUp(self):
+        del BUILT[:]
+        self.spec = Z('ops')
+        self.spec.add_option('verbose', ValType.BOOL, short_tag='v')
+        self.spec.add_subcommand('build', make_build_spec)
+        self.spec.add_subcommand('deploy', 'test_subcommands:make_deploy_spec')
+        for ndx in range(400):
+            self.spec.add_subcommand('cmd%03d' % ndx,
+                                     'no_such_module:make_spec')
+
+    def tearDown(self):
+        pass
+
+    def test_lazy(self):
+        """ Only the subcommand selected is ever built. """
+
+        compiled = self.spec.compile()
+        self.assertEqual(BUILT, [])
+        self.assertEqual(len(compiled.subcommands), 402)
+
+        result = compiled.parse(['-v', 'build', '-j', '4', '--targets',
+                                 'a', 'b'])
+        self.assertEqual(BUILT, ['build'])
+        self.assertTrue(result.verbose)
+        self.assertEqual(result.subcommand, 'build')
+        self.assertEqual(result.sub_options.jobs, 4)
+        self.assertEqual(result.sub_options.targets, ('a', 'b'))
+
+        # built once only
+        compiled.parse(['build'])
+        self.assertEqual(BUILT, ['build'])
+
+        result = compiled.parse(['deploy', '--env', 'prod'])
+        self.assertEqual(BUILT, ['build', 'deploy'])
+        self.assertFalse(result.verbose)
+        self.assertEqual(result.sub_options.env, 'prod')
+
+        result = compiled.parse(['-v'])
+        self.assertIsNone(result.subcommand)
+        self.assertIsNone(result.sub_options)
+
+    def test_errors(self):
+        """ Bad subcommands and options are reported. """
+
+        for args in (['nosuch'],
+                     ['cmd007'],                    # can't be imported
+                     ['build', '--env', 'prod'],    # deploy's option
+                     ['build', 'deploy']):
+            with self.assertRaises(OptionzError):
+                self.spec.parse(args)
+
+        with self.assertRaises(ValueError):
+            self.spec.add_subcommand('build', make_build_spec)
+        for name in ('', '--build'):
+            with self.assertRaises(OptionzError):
+                self.spec.add_subcommand(name, make_build_spec)
+        with self.assertRaises(OptionzError):
+            self.spec.add_subcommand('odd', 42)
+
+        self.spec.add_subcommand('bad', lambda: 42)
+        with self.assertRaises(OptionzError):
+            self.spec.parse(['bad'])
+
+        self.spec.add_option('subcommand', ValType.STR)
+        with self.assertRaises(OptionzError):
+            self.spec.compile()
+
+    def test_serialization(self):
+        """ Import paths survive JSON; callables can't. """
+
+        with self.assertRaises(OptionzError):
+            self.spec.to_json()
+
+        spec = Z('ops')
+        spec.add_subcommand('deploy', 'test_subcommands:make_deploy_spec')
+        copy = Z.from_json(spec.to_json())
+        self.assertEqual(copy.subcommands, ('deploy',))
+        self.assertEqual(copy.fingerprint(), spec.fingerprint())
+        result = copy.parse(['deploy'])
+        self.assertEqual(result.sub_options.env, 'staging')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# testTokenize.py
+
+""" Test splitting command lines into words. """
+
+import shlex
+import unittest
+
+from optionz import Optionz as Z
+from optionz import OptionzError, ValType, iter_tokenize, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    """ Test splitting command lines into words. """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_readme_example(self):
+        """ The example given in README.md. """
+
+        self.assertEqual(tokenize('abc   def  "ghi   jkl " mno'),
+                         ['abc', 'def', 'ghi   jkl ', 'mno'])
+
+    def test_rules(self):
+        """ Delimiter runs, quotes, and adjacency. """
+
+        self.assertEqual(tokenize(''), [])
+        self.assertEqual(tokenize(' \t  '), [])
+        self.assertEqual(tokenize('\tprog -f\t-b 52  --feelingGood '),
+                         ['prog', '-f', '-b', '52', '--feelingGood'])
+        self.assertEqual(tokenize("""a 'b "c" d' "e 'f' g" '' """),
+                         ['a', 'b "c" d', "e 'f' g", ''])
+        self.assertEqual(tokenize('--name="John Smith"x y'),
+                         ['--name=John Smithx', 'y'])
+        # no backslash escapes
+        self.assertEqual(tokenize(r'a\ b "c\"'), ['a\\', 'b', 'c\\'])
+
+        for text in ('a "b', "a 'b\"", '"'):
+            with self.assertRaises(OptionzError):
+                tokenize(text)
+
+    def test_generator(self):
+        """ iter_tokenize() yields the words lazily. """
+
+        words = iter_tokenize('a b "c')
+        self.assertEqual(next(words), 'a')
+        self.assertEqual(next(words), 'b')
+        with self.assertRaises(OptionzError):
+            next(words)
+
+        text = ' '.join('--opt%d "value %d"' % (n, n) for n in range(1000))
+        self.assertEqual(list(iter_tokenize(text)), shlex.split(text))
+
+    def test_parse(self):
+        """ Tokenized command lines can be parsed directly. """
+
+        my_optz = Z('fred')
+        my_optz.add_option('name', ValType.STR)
+        my_optz.add_option('count', ValType.INT, short_tag='c')
+        result = my_optz.parse(tokenize('--name "John  Smith" -c 3'))
+        self.assertEqual(result.name, 'John  Smith')
+        self.assertEqual(result.count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
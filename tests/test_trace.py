@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# testTrace.py
+
+""" Test tracing the phases of parsing. """
+
+import itertools
+import threading
+import unittest
+
+from optionz import Optionz as Z
+from optionz import OptionzError, PARSE_PHASES, ParseTracer, ValType
+
+
+def traced_subcommand():
+    """
+    Build a subcommand mixing a choice, a flag and a list, so that
+    traces cover a nested parse of every option kind.
+    """
+    spec = Z('deploy')
+    spec.add_choice_option('env', ['staging', 'prod'], 'staging')
+    spec.add_option('force', ValType.BOOL, short_tag='f')
+    spec.add_list_option('hosts', -2, ValType.INT, short_tag='h')
+    return spec
+
+
+# argument vectors exercising every path through the parser
+ARGVS = [
+    [],
+    ['-v'],
+    ['-vx'],
+    ['-vj4'],
+    ['-j', '4', '--ratio=0.5'],
+    ['--verb', '--name', 'bob', '--mode', 'fast'],
+    ['--shards', '1', '2', '3', '--files', 'a', 'b', '--retries', '2'],
+    ['--shards=7', '8', '--pair', 'p', 'q'],
+    ['-v', 'deploy', '--env', 'prod'],
+    ['deploy'],
+    ['-j', '2', 'deploy', '-fh1', '2', '--en=prod'],
+    ['deploy', '--hosts', '1', '--hosts', '2'],
+    ['deploy', '--hosts', '1', '2', '3'],
+    ['deploy', '--env', 'test'],
+    ['deploy', '--nosuch'],
+    ['deploy', '-fz'],
+    ['deploy', 'stray'],
+    ['--files', 'a', 'deploy'],
+    ['-j', 'four'],
+    ['--mode', 'slow'],
+    ['--pair', 'p'],
+    ['--nosuch'],
+    ['--verbose=yes'],
+    ['stray'],
+    ['-q'],
+]
+
+
+# tokens combined into every short argument vector, see test_sweep()
+TOKENS = ['-v', '-vj', '-j', '3', 'x', '--mode', 'fast', '--pair=p',
+          '--shards', '-1', '--r', 'deploy', '-fh7', '--env']
+
+
+class TestTrace(unittest.TestCase):
+    """ Test tracing the phases of parsing. """
+
+    def setUp(self):
+        spec = Z('jobs')
+        spec.add_option('verbose', ValType.BOOL, short_tag='v')
+        spec.add_option('extra', ValType.BOOL, short_tag='x')
+        spec.add_option('jobs', ValType.INT, 1, short_tag='j')
+        spec.add_option('ratio', ValType.FLOAT, 1.0)
+        spec.add_option('name', ValType.STR, 'anon')
+        spec.add_option('retries', ValType.INT, 3)
+        spec.add_choice_option('mode', ['fast', 'safe'], 'safe')
+        spec.add_list_option('shards', 0, ValType.INT)
+        spec.add_list_option('files', 0)
+        spec.add_list_option('pair', 2)
+        spec.add_subcommand('deploy', traced_subcommand)
+        self.spec = spec
+        self.compiled = spec.compile()
+
+    def tearDown(self):
+        pass
+
+    def parse_all(self, argvs=ARGVS):
+        """ Parse every argument vector, returning results or errors. """
+        results = []
+        for argv in argvs:
+            try:
+                results.append(self.compiled.parse(argv))
+            except OptionzError as exc:
+                results.append(str(exc))
+        return results
+
+    def test_same_results(self):
+        """ Traced parsing returns what untraced parsing does. """
+
+        expected = self.parse_all()
+        with self.compiled.trace() as tracer:
+            got = self.parse_all()
+        self.assertEqual(got, expected)
+        self.assertEqual(tracer.count, len(ARGVS))
+        self.assertEqual(tracer.failures,
+                         sum(isinstance(item, str) for item in expected))
+
+        # through the parse cache, traced once, then served from it
+        self.compiled.enable_parse_cache()
+        with self.compiled.trace() as tracer:
+            self.assertEqual(self.parse_all(), expected)
+            self.assertEqual(self.parse_all(), expected)
+        failures = sum(isinstance(item, str) for item in expected)
+        self.assertEqual(tracer.count, len(ARGVS) + failures)
+        self.assertEqual(tracer.failures, 2 * failures)
+
+        # and through parse_many()
+        with self.compiled.trace():
+            got = list(self.compiled.parse_many(ARGVS, errors='return'))
+        self.assertEqual([item if isinstance(item, tuple) else str(item)
+                          for item in got], expected)
+
+    def test_sweep(self):
+        """ Traced and untraced parsing agree on every short argv. """
+
+        argvs = [list(argv) for size in range(4)
+                 for argv in itertools.product(TOKENS, repeat=size)]
+        expected = self.parse_all(argvs)
+        with self.compiled.trace():
+            got = self.parse_all(argvs)
+        for argv, want, have in zip(argvs, expected, got):
+            self.assertEqual(have, want, argv)
+
+    def test_phases(self):
+        """ Each parse is reported, phase by phase, and in total. """
+
+        traces = []
+        with self.spec.trace(ParseTracer(traces.append)) as tracer:
+            self.compiled.parse(['-vj4', '--shards', '1', '2', '--mode',
+                                 'fast', 'deploy', '--env', 'prod'])
+            with self.assertRaises(OptionzError):
+                self.compiled.parse(['--nosuch'])
+        self.assertEqual(len(traces), 2)
+        self.assertIs(tracer.last, traces[-1])
+
+        first = traces[0]
+        self.assertEqual(first.args[0], '-vj4')
+        self.assertIsNone(first.error)
+        self.assertEqual(tuple(first.times), PARSE_PHASES)
+        self.assertEqual(tuple(first.blocks), PARSE_PHASES)
+        for phase in PARSE_PHASES:
+            self.assertGreaterEqual(first.times[phase], 0, phase)
+        self.assertGreater(sum(first.times.values()), 0)
+        self.assertTrue(isinstance(traces[1].error, OptionzError))
+
+        totals = tracer.times()
+        for phase in PARSE_PHASES:
+            self.assertEqual(totals[phase], first.times[phase] +
+                             traces[1].times[phase])
+            self.assertEqual(tracer.blocks()[phase],
+                             first.blocks[phase] + traces[1].blocks[phase])
+
+        # plain values are converted, not validated
+        with self.compiled.trace() as tracer:
+            self.compiled.parse(['-j', '4', '--name', 'x', '--ratio', '.5'])
+        self.assertEqual(tracer.last.times['validate'], 0)
+        self.assertGreater(tracer.last.times['convert'], 0)
+
+    def test_threads(self):
+        """ Threads sharing a tracer each have their parses timed apart. """
+
+        traces = []
+        lock = threading.Lock()
+
+        def keep(trace):
+            """ Keep each trace, from whichever thread. """
+            with lock:
+                traces.append(trace)
+
+        def work():
+            """ Parse repeatedly. """
+            for _ in range(200):
+                self.compiled.parse(['-vj4', '--files', 'a', 'b'])
+
+        with self.compiled.trace(ParseTracer(keep)) as tracer:
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(tracer.count, 8 * 200)
+        self.assertEqual(len(traces), 8 * 200)
+        totals = dict.fromkeys(PARSE_PHASES, 0)
+        for trace in traces:
+            for phase in PARSE_PHASES:
+                self.assertGreaterEqual(trace.times[phase], 0)
+                totals[phase] += trace.times[phase]
+        self.assertEqual(tracer.times(), totals)
+
+    def test_no_allocations(self):
+        """ Counting allocations may be turned off. """
+
+        with self.compiled.trace(ParseTracer(allocations=False)) as tracer:
+            self.compiled.parse(['--files', 'a', 'b'])
+        self.assertEqual(set(tracer.last.blocks.values()), {0})
+
+    def test_install(self):
+        """ Tracing is undone on leaving the context, and not nested. """
+
+        with self.compiled.trace() as tracer:
+            with self.assertRaises(OptionzError):
+                with self.compiled.trace():
+                    pass
+            self.compiled.parse(['-v'])
+        self.assertNotIn('_parser', self.compiled.__dict__)
+        self.compiled.parse(['-v'])
+        self.assertEqual(tracer.count, 1)
+
+        # results from the parse cache are not traced
+        self.compiled.enable_parse_cache()
+        with self.compiled.trace() as tracer:
+            self.compiled.parse(['-v'])
+            self.compiled.parse(['-v'])
+        self.assertEqual(tracer.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
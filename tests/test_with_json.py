@@ -3,11 +3,13 @@
 
 """ Test serialization with Json. """
 
+import json
 import time
 import unittest
 
 from rnglib import SimpleRNG
-from optionz import(BoolOption, ChoiceOption,
+from optionz import Optionz as Z
+from optionz import(ValType, ZOption, BoolOption, ChoiceOption,
                     FloatOption, IntOption, ListOption, StrOption)
 
 
@@ -20,6 +22,19 @@ class TestWithJson(unittest.TestCase):
     def tearDown(self):
         pass
 
+    # utility functions #############################################
+
+    def check_round_trip(self, *options):
+        """ Options survive conversion to JSON and back. """
+        for opt in options:
+            text = json.dumps(opt.to_dict())
+            copy = ZOption.from_dict(json.loads(text))
+            self.assertEqual(type(copy), type(opt))
+            self.assertEqual(copy, opt)
+            self.assertEqual(copy.val_type, opt.val_type)
+
+    # actual unit tests #############################################
+
     def test_bool_options(self):
         """ Interpret a string on the command line as a boolean value. """
 
@@ -38,7 +53,7 @@ class TestWithJson(unittest.TestCase):
         self.assertFalse(o3_.default)
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
 
     def test_choice_options(self):
         """ Test choices option where must use value from list. """
@@ -68,7 +83,9 @@ class TestWithJson(unittest.TestCase):
         self.assertEqual(o3_.default, 'c')
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
+        copy = ZOption.from_dict(json.loads(json.dumps(o3_.to_dict())))
+        self.assertEqual(copy.choices, ['a', 'b', 'c'])
 
     def test_float_options(self):
         """
@@ -90,7 +107,7 @@ class TestWithJson(unittest.TestCase):
         self.assertIsNone(o3_.default)
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
 
     def test_int_options(self):
         """
@@ -112,7 +129,7 @@ class TestWithJson(unittest.TestCase):
         self.assertIsNone(o3_.default)
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
 
     def test_list_options(self):
         """
@@ -137,7 +154,11 @@ class TestWithJson(unittest.TestCase):
         self.assertEqual(o3_.default, None)
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
+        data = ListOption('curly', default=-3).to_dict()
+        self.assertEqual(data['size'], -3)
+        self.assertFalse('default' in data)
+        self.assertEqual(ZOption.from_dict(data).size, -3)
 
     def test_str_options(self):
         """
@@ -159,7 +180,41 @@ class TestWithJson(unittest.TestCase):
         self.assertIsNone(o3_.default)
         self.assertEqual(o3_.desc, "george")
 
-        # NOTE No json yet
+        self.check_round_trip(o1_, o2_, o3_)
+
+    def test_optionz(self):
+        """ A whole specification survives conversion to JSON and back. """
+
+        my_optz = Z('fred', 'frivolous', 'fabulous')
+        my_optz.add_option('bO', ValType.BOOL, True, 'small', short_tag='b')
+        my_optz.add_choice_option('cO', ['a', 'b', 'c'], 'c', 'a list')
+        my_optz.add_option('fO', ValType.FLOAT, self.rng.next_real())
+        my_optz.add_option('iO', ValType.INT, self.rng.next_int32(),
+                           short_tag='i')
+        my_optz.add_option('lO', ValType.LIST, -4, 'chunky')
+        my_optz.add_option('sO', ValType.STR, self.rng.next_file_name(12))
+
+        copy = Z.from_json(my_optz.to_json())
+        self.assertEqual(copy.name, 'fred')
+        self.assertEqual(copy.desc, 'frivolous')
+        self.assertEqual(copy.epilog, 'fabulous')
+        self.assertEqual(len(copy), 6)
+        self.assertEqual(copy.to_dict(), my_optz.to_dict())
+        self.assertEqual(copy.fingerprint(), my_optz.fingerprint())
+        self.assertEqual(copy.short_tag('iO'), 'i')
+        self.assertEqual(copy.parse(['-i', '5', '--lO', 'x']),
+                         my_optz.parse(['-i', '5', '--lO', 'x']))
+
+        # bulk loading still rejects duplicates
+        data = my_optz.to_dict()
+        data['options'].append(IntOption('iO').to_dict())
+        with self.assertRaises(ValueError):
+            Z.from_dict(data)
+
+        data = my_optz.to_dict()
+        data['options'][-1]['short_tag'] = 'b'
+        with self.assertRaises(ValueError):
+            Z.from_dict(data)
 
 
 if __name__ == '__main__':